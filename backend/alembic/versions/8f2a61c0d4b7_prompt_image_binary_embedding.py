@@ -0,0 +1,83 @@
+"""prompt_image binary float32 embedding
+
+Revision ID: 8f2a61c0d4b7
+Revises: 53d3d3e29f39
+Create Date: 2026-10-18 09:12:44.120581
+
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8f2a61c0d4b7"
+down_revision: Union[str, Sequence[str], None] = "53d3d3e29f39"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def backfill(source: str, target: str, convert) -> None:
+    """Copies `source` into `target` in id-ordered batches."""
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                f"SELECT id, {source} FROM prompt_images "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+
+        connection.execute(
+            sa.text(f"UPDATE prompt_images SET {target} = :value WHERE id = :id"),
+            [{"id": x[0], "value": convert(x[1])} for x in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "prompt_images", sa.Column("embedding_vector", sa.LargeBinary(), nullable=True)
+    )
+    backfill(
+        "embedding",
+        "embedding_vector",
+        lambda x: np.asarray(json.loads(x), dtype=EMBEDDING_DTYPE).tobytes(),
+    )
+    op.drop_column("prompt_images", "embedding")
+    op.alter_column(
+        "prompt_images",
+        "embedding_vector",
+        new_column_name="embedding",
+        nullable=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "prompt_images", sa.Column("embedding_string", sa.String(), nullable=True)
+    )
+    backfill(
+        "embedding",
+        "embedding_string",
+        lambda x: str(np.frombuffer(x, dtype=EMBEDDING_DTYPE).tolist()),
+    )
+    op.drop_column("prompt_images", "embedding")
+    op.alter_column(
+        "prompt_images",
+        "embedding_string",
+        new_column_name="embedding",
+        nullable=False,
+    )
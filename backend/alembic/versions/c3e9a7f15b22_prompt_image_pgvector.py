@@ -0,0 +1,78 @@
+"""prompt_image pgvector embedding with hnsw index
+
+Revision ID: c3e9a7f15b22
+Revises: 8f2a61c0d4b7
+Create Date: 2026-10-18 10:03:17.482913
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e9a7f15b22"
+down_revision: Union[str, Sequence[str], None] = "8f2a61c0d4b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    is_available = connection.execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")
+    ).scalar()
+    if not is_available:
+        # The application falls back to the in-memory vector index
+        logger.warning("pgvector extension is not available, skipping")
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute("ALTER TABLE prompt_images ADD COLUMN embedding_pgvector vector(384)")
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, embedding FROM prompt_images "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+
+        connection.execute(
+            sa.text(
+                "UPDATE prompt_images SET embedding_pgvector = CAST(:value AS vector) "
+                "WHERE id = :id"
+            ),
+            [
+                {
+                    "id": x[0],
+                    "value": str(np.frombuffer(x[1], dtype=EMBEDDING_DTYPE).tolist()),
+                }
+                for x in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    op.execute(
+        "CREATE INDEX ix_prompt_images_embedding_pgvector ON prompt_images "
+        "USING hnsw (embedding_pgvector vector_cosine_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_prompt_images_embedding_pgvector")
+    op.execute("ALTER TABLE prompt_images DROP COLUMN IF EXISTS embedding_pgvector")
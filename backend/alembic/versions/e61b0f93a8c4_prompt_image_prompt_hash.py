@@ -0,0 +1,66 @@
+"""prompt_image normalized prompt hash
+
+Revision ID: e61b0f93a8c4
+Revises: c3e9a7f15b22
+Create Date: 2026-10-18 11:26:05.913364
+
+"""
+
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e61b0f93a8c4"
+down_revision: Union[str, Sequence[str], None] = "c3e9a7f15b22"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def fingerprint_prompt(text: str) -> str:
+    # Frozen copy of `app.utilities.text.fingerprint_prompt` as of this revision,
+    # so re-running it always produces the hashes it originally stored
+    return hashlib.sha256(" ".join(text.casefold().split()).encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "prompt_images", sa.Column("prompt_hash", sa.String(length=64), nullable=True)
+    )
+
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, prompt_text FROM prompt_images "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+
+        connection.execute(
+            sa.text("UPDATE prompt_images SET prompt_hash = :value WHERE id = :id"),
+            [{"id": x[0], "value": fingerprint_prompt(x[1])} for x in rows],
+        )
+        last_id = rows[-1][0]
+
+    op.create_index(
+        op.f("ix_prompt_images_prompt_hash"),
+        "prompt_images",
+        ["prompt_hash"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_prompt_images_prompt_hash"), table_name="prompt_images")
+    op.drop_column("prompt_images", "prompt_hash")
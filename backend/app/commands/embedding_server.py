@@ -0,0 +1,97 @@
+"""
+Serves one embedding model to every API worker on the node over a Unix
+socket, instead of each worker loading its own copy:
+
+    uv run python -m app.commands.embedding_server --socket /tmp/embedding.sock
+    EMBEDDING_SERVER_SOCKET=/tmp/embedding.sock uvicorn app.main:app --workers 4
+
+Concurrent requests from all workers are micro-batched into shared forward passes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from app.services.embedding import (
+    EMBEDDING_BACKENDS,
+    FRAME_HEADER,
+    EmbeddingModel,
+    create_local_embedding_model,
+    warm_up_model,
+)
+from app.utilities.batcher import MicroBatcher
+from app.utilities.config import CONFIG
+from app.utilities.executor import run_blocking
+from app.utilities.logger import logger
+
+
+class EmbeddingServer:
+    def __init__(self, embedding_model: EmbeddingModel):
+        self.model = embedding_model
+        self.batcher = MicroBatcher(
+            lambda texts: list(embedding_model.encode(texts)),
+            max_batch_size=CONFIG.EMBEDDING.MAX_BATCH_SIZE,
+            max_wait=CONFIG.EMBEDDING.BATCH_WINDOW_MS / 1000,
+        )
+
+    async def encode(self, texts: list[str]) -> bytes:
+        try:
+            embeddings = await self.batcher.submit_many(texts)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return b"E" + str(e).encode()
+        return b"O" + b"".join(x.tobytes() for x in embeddings)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                (size,) = FRAME_HEADER.unpack(header)
+                request = json.loads(await reader.readexactly(size))
+                if isinstance(request, dict) and request.get("op") == "identity":
+                    # Clients namespace their persistent caches with it
+                    response = b"O" + self.model.identity.encode()
+                else:
+                    response = await self.encode(request)
+                writer.write(FRAME_HEADER.pack(len(response)) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: str):
+        await run_blocking(warm_up_model, self.model)
+        logger.info("Embedding model ready", extra=self.model.stats())
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=socket_path)
+        logger.info("Embedding server listening", extra={"socket": socket_path})
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--socket",
+        default=CONFIG.EMBEDDING.SERVER_SOCKET or "/tmp/embedding.sock",
+    )
+    parser.add_argument("--model", default=CONFIG.EMBEDDING.MODEL_NAME)
+    parser.add_argument(
+        "--backend",
+        choices=list(EMBEDDING_BACKENDS),
+        default=CONFIG.EMBEDDING.BACKEND,
+    )
+    args = parser.parse_args()
+
+    server = EmbeddingServer(create_local_embedding_model(args.backend, args.model))
+    asyncio.run(server.serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
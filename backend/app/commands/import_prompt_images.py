@@ -0,0 +1,55 @@
+"""
+Bulk imports prompt images from a CSV or NDJSON catalogue with `prompt_text`
+and `image_url` fields, plus optional `is_public` and `key_word`:
+
+    uv run python -m app.commands.import_prompt_images catalogue.csv --user-id 1
+
+Progress is checkpointed after every committed batch, so running the same
+command again resumes after the last one.
+"""
+
+import argparse
+import json
+
+from app.models.enums.bulk_import import ImportFormat, ImportMethod
+from app.services.prompt_image_import import import_prompt_images
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("path")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--format", choices=[x.value for x in ImportFormat])
+    parser.add_argument(
+        "--method",
+        choices=[x.value for x in ImportMethod],
+        default=ImportMethod.INSERT.value,
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--encode-batch-size", type=int, default=256)
+    parser.add_argument(
+        "--private",
+        action="store_true",
+        help="visibility of records without `is_public`",
+    )
+    parser.add_argument("--checkpoint", help="defaults to `<path>.checkpoint.json`")
+    args = parser.parse_args()
+
+    result = import_prompt_images(
+        path=args.path,
+        user_id=args.user_id,
+        file_format=args.format,
+        method=args.method,
+        batch_size=args.batch_size,
+        encode_batch_size=args.encode_batch_size,
+        is_public=not args.private,
+        checkpoint_path=args.checkpoint,
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,8 @@ from app.models.databases.orm.user import User
 
 # Import Services (The file above)
 from app.services.authentication import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_tokens,
     decode_refresh_token,
 )
@@ -31,7 +31,7 @@ async def signup(payload: SignupRequest, db: Session = Depends(get_db)):
         )
 
     # 2. Hash Password (The service handles truncation now)
-    hashed_pw = hash_password(payload.password)
+    hashed_pw = await hash_password_async(payload.password)
 
     new_user = User(username=payload.username, email=payload.email, password=hashed_pw)
 
@@ -52,7 +52,7 @@ async def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenRe
     user = get_user(db, email=payload.email)
 
     # verify_password handles truncation safety
-    if not verify_password(payload.password, user.password):
+    if not await verify_password_async(payload.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid credentials"
@@ -1,83 +1,153 @@
-from sqlalchemy.orm import Session
+from typing import Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.databases.orm.user import User
-from fastapi import Depends
+from fastapi import Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
 from app.decorators.export import export_async
 from app.models.databases.queries.prompt_image import LazyloadPromptImageResultModel
-from app.models.pydantic_schemas.base import LazyloadRequestModel
-from app.models.response_models.prompt_image import PromptImageResponseModel
+from app.models.pydantic_schemas.base import LazyloadRequestModel, EmbedBatchRequest
+from app.models.response_models.prompt_image import (
+    PromptImageResponseModel,
+    PromptImageJobResponseModel,
+    EmbedBatchResponseModel,
+)
 from app.queries.prompt_image import (
-    save_prompt_image,
-    get_prompt_images,
     lazyload_prompt_images as query_lazyload_prompt_images,
 )
-from app.models.databases.orm.prompt_image import PromptImage
-from app.utilities.postgresql import get_db, get_slave_db, get_async_slave_db
-from app.utilities.logger import logger
+from app.utilities.job_queue import Job, JobQueueFull
+from app.utilities.postgresql import get_async_slave_db
+from app.utilities.logger import Lazy, logger
+from app.utilities.text import fingerprint_prompt
 
 from app.services.embedding import (
-    generate_embedding,
-    calculate_similarity,
-    SIMILARITY_THRESHOLD,
+    generate_embeddings_async,
+    embedding_to_vector,
+)
+from app.services.prompt_image import (
+    generation_flight,
+    generation_jobs,
+    get_generation_key,
+    resolve_prompt_image,
 )
-from app.services.pollination import generate_image_content
-from app.services.cloudinary import upload_image_to_cloud
-from app.services.authentication import get_current_user
+from app.services.similarity import find_exact_prompt_image
+from app.services.authentication import get_current_user_async
 
 
 async def create_prompt_image(
     prompt_text: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_async),
     is_public: bool = True,
-    db: Session = Depends(get_db),
-    slave_db: Session = Depends(get_slave_db),
-) -> PromptImageResponseModel:
+    async_slave_db: AsyncSession = Depends(get_async_slave_db),
+    background: bool = False,
+) -> Union[PromptImageResponseModel, PromptImageJobResponseModel]:
     user_id = current_user.id
     """Handles logic for checking similarity, generating, and uploading images."""
-    new_embedding = generate_embedding(prompt_text)
+    # Exact repeats skip both the embedding and the similarity search
+    prompt_hash = fingerprint_prompt(prompt_text)
+    exact_match = await find_exact_prompt_image(async_slave_db, prompt_hash)
+    if exact_match is not None:
+        logger.debug("Exact prompt found", extra={"id": exact_match.id})
+        if background:
+            return to_job_response(await generation_jobs.record(exact_match, user_id))
+        return exact_match
+
+    async def generate() -> PromptImageResponseModel:
+        result = await generation_flight.do(
+            get_generation_key(prompt_hash, user_id, is_public),
+            lambda: resolve_prompt_image(
+                user_id=user_id,
+                prompt_text=prompt_text,
+                prompt_hash=prompt_hash,
+                is_public=is_public,
+            ),
+        )
+        return PromptImageResponseModel.model_validate(result)
+
+    if not background:
+        return await generate()
 
-    existing_prompts = get_prompt_images(
-        db=slave_db,
-        is_public=True,
+    try:
+        job = await generation_jobs.submit(generate, owner_id=user_id)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    return to_job_response(job)
+
+
+def to_job_response(job: Job) -> PromptImageJobResponseModel:
+    return PromptImageJobResponseModel(
+        id=job.id,
+        status=job.status,
+        result=job.result,
+        error=job.error,
     )
-    for entry in existing_prompts:
-        similarity = calculate_similarity(new_embedding, entry.embedding)
-        if similarity >= SIMILARITY_THRESHOLD:
-            logger.debug(
-                "Similarity found", extra={"similarity": similarity, "id": entry.id}
-            )
-            return entry
-
-    logger.debug("No similarity found. Generating new image...")
-    image_bytes = await generate_image_content(prompt_text)
-
-    # Proper Cloudinary upload using the Python SDK
-    cloud_url = upload_image_to_cloud(image_bytes)
-
-    new_record = PromptImage(
-        user_id=user_id,
-        prompt_text=prompt_text,
-        embedding=new_embedding,
-        image_url=cloud_url,
-        is_public=is_public,
-        key_word=None,
+
+
+async def get_owned_job(job_id: str, user_id: int) -> Job:
+    job = await generation_jobs.get(job_id)
+    # Other users' jobs are reported as missing rather than forbidden
+    if job is None or job.owner_id != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+async def get_prompt_image_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user_async),
+) -> PromptImageJobResponseModel:
+    """Returns the status, and once finished the result, of a generation job."""
+    return to_job_response(await get_owned_job(job_id, current_user.id))
+
+
+async def stream_prompt_image_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user_async),
+) -> StreamingResponse:
+    """Streams generation job status changes as Server-Sent Events."""
+    job = await get_owned_job(job_id, current_user.id)
+
+    async def events():
+        while True:
+            data = to_job_response(job).model_dump_json()
+            yield f"event: {job.status.value}\ndata: {data}\n\n"
+            if job.is_finished:
+                return
+            # Comment lines keep proxies from closing an idle stream
+            while not await generation_jobs.wait(job, timeout=15):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    return save_prompt_image(db=db, prompt_image=new_record)
+
+async def embed_prompts(
+    payload: EmbedBatchRequest,
+    _: User = Depends(get_current_user_async),
+) -> EmbedBatchResponseModel:
+    """Embeds prompts in bulk, e.g. to pre-warm caches ahead of traffic."""
+    embeddings = await generate_embeddings_async(payload.prompts)
+    vectors = [embedding_to_vector(x).tolist() for x in embeddings]
+    return EmbedBatchResponseModel(
+        count=len(vectors),
+        dimension=len(vectors[0]),
+        embeddings=vectors,
+    )
 
 
 @export_async
 async def lazyload_prompt_images(
     payload: LazyloadRequestModel,
     async_slave_db: AsyncSession = Depends(get_async_slave_db),
-    _: User = Depends(get_current_user),
+    _: User = Depends(get_current_user_async),
 ) -> LazyloadPromptImageResultModel:
     """Asynchronously loads paginated and filtered prompt images."""
     logger.debug(
         "Lazyload Prompt Images Payload Received",
         extra={
-            "payload": payload.model_dump(),
+            "payload": Lazy(payload.model_dump),
         },
     )
     return await query_lazyload_prompt_images(
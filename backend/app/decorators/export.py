@@ -12,7 +12,10 @@ def export_async(func):
             and hasattr(kwargs["payload"], "export")
             and kwargs["payload"].export is True
         ):
-            result = prepare_streaming_response(result)
+            result = prepare_streaming_response(
+                result,
+                export_format=getattr(kwargs["payload"], "format", None),
+            )
 
         return result
 
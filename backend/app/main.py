@@ -1,9 +1,82 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.queries.base import query_plans
 from app.routes import prompt_image
 from app.routes import authentication
+from app.services.embedding import (
+    embedding_batcher,
+    embedding_cache,
+    model,
+    start_embedding_model,
+)
+from app.services.authentication import password_executor
+from app.services.prompt_image import generation_flight, generation_jobs
+from app.services.similarity import exact_prompt_cache, is_pgvector_search_enabled
+from app.services.vector_index import refresh_prompt_image_index
+from app.utilities.config import CONFIG
+from app.utilities.executor import run_blocking
+from app.utilities.http_client import http_clients
+from app.utilities.logger import get_logging_stats, logger
+from app.utilities.engine import get_pool_stats
+from app.utilities.postgresql import (
+    AsyncSlaveSessionLocal,
+    check_replicas_periodically,
+    replica_router,
+)
+from app.utilities.query_cache import query_cache
+from app.utilities.user_cache import user_cache
+
+
+async def refresh_prompt_image_index_periodically():
+    while True:
+        await asyncio.sleep(CONFIG.VECTOR_INDEX.REFRESH_INTERVAL)
+        try:
+            await run_blocking(refresh_prompt_image_index)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Prompt image index refresh failed", extra={"error": str(e)})
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    started = time.perf_counter()
+    # Loads alongside the index build, `/ready` reports once it can encode
+    model_task = asyncio.create_task(start_embedding_model())
+    replica_task = None
+    if replica_router.replicas:
+        replica_task = asyncio.create_task(check_replicas_periodically())
+
+    async with AsyncSlaveSessionLocal() as async_slave_db:
+        use_pgvector = await is_pgvector_search_enabled(async_slave_db)
 
-app = FastAPI(title="AI Cache Saver")
+    # Build the in-memory similarity index before accepting generate requests
+    refresh_task = None
+    if not use_pgvector:
+        await run_blocking(refresh_prompt_image_index, full=True)
+        refresh_task = asyncio.create_task(refresh_prompt_image_index_periodically())
+    await http_clients.start()
+    logger.info(
+        "Startup complete",
+        extra={"startup_seconds": round(time.perf_counter() - started, 3)},
+    )
+    yield
+    model_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await model_task
+    await generation_jobs.stop()
+    await embedding_batcher.stop()
+    await http_clients.stop()
+    for task in (refresh_task, replica_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+
+app = FastAPI(title="AI Cache Saver", lifespan=lifespan)
 
 # Basic CORS to prevent browser blocks
 app.add_middleware(
@@ -31,3 +104,30 @@ app.include_router(
 @app.get("/health")
 async def health():
     return {"status": "running"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness, unlike `/health` it fails until the embedding model can encode."""
+    if not model.is_ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready", "embedding_model": model.stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "generation_flight": generation_flight.stats(),
+        "generation_jobs": generation_jobs.stats(),
+        "exact_prompt_cache": exact_prompt_cache.stats(),
+        "embedding_model": model.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "http_clients": http_clients.stats(),
+        "query_cache": query_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "password_executor": password_executor.stats(),
+        "query_plans": query_plans.stats(),
+        "replicas": replica_router.stats(),
+        "db_pools": get_pool_stats(),
+        "logging": get_logging_stats(),
+    }
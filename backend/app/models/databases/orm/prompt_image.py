@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, LargeBinary
 from sqlalchemy.orm import relationship
 from app.models.databases.orm.base import Base, AuditModel
 
@@ -9,7 +9,8 @@ class PromptImage(Base, AuditModel):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     prompt_text = Column(String, index=True, nullable=False)
-    embedding = Column(String, nullable=False)
+    prompt_hash = Column(String(64), index=True, nullable=True)
+    embedding = Column(LargeBinary, nullable=False)
     image_url = Column(String, nullable=True)
     is_public = Column(Boolean, default=False, nullable=False)
     key_word = Column(String, index=True, nullable=True)
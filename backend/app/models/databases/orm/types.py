@@ -0,0 +1,35 @@
+import numpy as np
+from sqlalchemy import Float
+from sqlalchemy.types import UserDefinedType
+
+
+class Vector(UserDefinedType):
+    """pgvector `vector(n)` column, bound and loaded through its text format."""
+
+    cache_ok = True
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    def get_col_spec(self, **kw):
+        return f"vector({self.dimension})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None:
+                return None
+            return str(np.asarray(value, dtype=np.float32).tolist())
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None:
+                return None
+            return np.asarray(value.strip("[]").split(","), dtype=np.float32)
+
+        return process
+
+    class comparator_factory(UserDefinedType.Comparator):
+        def cosine_distance(self, other):
+            return self.op("<=>", return_type=Float)(other)
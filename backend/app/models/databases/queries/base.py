@@ -2,7 +2,9 @@ from typing import Optional, Any
 from sqlalchemy.engine.row import Row
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from app.models.enums.queries.base import (
+    CountStrategy,
     FilterOperator,
+    PaginationMode,
     SortOrder,
 )
 from app.utilities.datetime import str2date
@@ -156,8 +158,21 @@ class PaginateModel(BaseModel):
         json_schema_extra={"example": 10},
     )
     page: Optional[int] = Field(default=1, ge=0)
+    mode: Optional[PaginationMode] = Field(default=PaginationMode.OFFSET)
+    # Opaque `next_cursor` of the previous keyset page
+    cursor: Optional[str] = Field(default=None)
+    count_strategy: Optional[CountStrategy] = Field(default=CountStrategy.EXACT)
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(
+        extra="forbid",
+        use_enum_values=True,
+    )
+
+    @field_validator("cursor")
+    def validate_cursor(cls, v, values):
+        if v is not None and values.data.get("mode") != PaginationMode.KEYSET:
+            raise ValueError("`cursor` is only supported in keyset mode")
+        return v
 
 
 class SortModel(BaseModel):
@@ -193,6 +208,10 @@ class QueryResultModel(BaseModel):
 class LazyLoadResult(BaseModel):
     columns: list[str]
     data: list[Row]
-    count: int
+    count: Optional[int] = None
+    has_more: Optional[bool] = None
+    next_cursor: Optional[str] = None
+    # Exports stream rows from this statement instead of loading `data`
+    select_query: Optional[Any] = Field(default=None, exclude=True)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
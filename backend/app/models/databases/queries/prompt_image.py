@@ -7,7 +7,8 @@ class DetailedPromptImageQueryResultModel(QueryResultModel):
     id: Optional[int] = None
     user_id: Optional[int] = None
     prompt_text: Optional[str] = None
-    embedding: Optional[str] = None
+    prompt_hash: Optional[str] = None
+    embedding: Optional[bytes] = None
     image_url: Optional[str] = None
     is_public: Optional[bool] = None
     key_word: Optional[str] = None
@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ImportMethod(str, Enum):
+    INSERT = "insert"
+    COPY = "copy"
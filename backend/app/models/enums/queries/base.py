@@ -200,3 +200,15 @@ class FilterOperator(str, Enum):
 class SortOrder(str, Enum):
     ASCENDING = "asc"
     DESCENDING = "desc"
+
+
+class PaginationMode(str, Enum):
+    OFFSET = "offset"
+    KEYSET = "keyset"
+
+
+class CountStrategy(str, Enum):
+    EXACT = "exact"
+    NONE = "none"
+    ESTIMATE = "estimate"
+    HAS_MORE = "has_more"
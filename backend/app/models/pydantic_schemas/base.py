@@ -5,6 +5,7 @@ from app.models.databases.queries.base import (
     SortModel,
     PaginateModel,
 )
+from app.models.enums.export import ExportFormat
 
 
 class RequestModel(BaseModel):
@@ -45,6 +46,7 @@ class LazyloadRequestModel(RequestModel):
         default=[],
     )
     export: Optional[bool] = Field(default=False)
+    format: Optional[ExportFormat] = Field(default=ExportFormat.CSV)
 
 
 class EnumResponseModel(BaseModel):
@@ -76,3 +78,7 @@ class SignupRequest(BaseModel):
     username: str
     email: EmailStr
     password: str
+
+
+class EmbedBatchRequest(BaseModel):
+    prompts: list[str] = Field(min_length=1, max_length=1000)
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from app.models.enums.job import JobStatus
 
 
 class PromptImageResponseModel(BaseModel):
@@ -12,3 +13,16 @@ class PromptImageResponseModel(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class EmbedBatchResponseModel(BaseModel):
+    count: int
+    dimension: int
+    embeddings: list[list[float]]
+
+
+class PromptImageJobResponseModel(BaseModel):
+    id: str
+    status: JobStatus
+    result: Optional[PromptImageResponseModel] = None
+    error: Optional[str] = None
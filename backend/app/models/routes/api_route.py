@@ -18,6 +18,7 @@ class InterceptorAPIRoute(APIRoute):
                         "detail": http_exc.detail,
                         "message": "Request failed", 
                     },
+                    headers=http_exc.headers,
                 )
             
             except Exception as e:
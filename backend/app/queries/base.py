@@ -1,21 +1,30 @@
-from typing import Union, Type
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional, Union, Type
 from functools import reduce
 from sqlalchemy import (
     func,
+    text,
+    Table,
     asc,
     desc,
     union_all,
     or_,
     and_,
+    tuple_,
     literal_column,
     select,
+    ColumnElement,
     ColumnOperators,
     Select,
     CompoundSelect,
     BinaryExpression,
 )
 from sqlalchemy.orm import Session
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.engine.row import Row
 from app.models.databases.orm.base import Base
 from app.models.databases.queries.base import (
@@ -23,14 +32,23 @@ from app.models.databases.queries.base import (
     SortModel,
     PaginateModel,
 )
-from app.models.enums.queries.base import FilterOperator, SortOrder
+from app.models.enums.queries.base import (
+    CountStrategy,
+    FilterOperator,
+    PaginationMode,
+    SortOrder,
+)
 
 from app.models.databases.queries.base import LazyLoadResult
 from app.models.exceptions import NotFoundException, LogicException
 from app.utilities.query import (
+    decode_cursor,
+    encode_cursor,
     has_aggregation_function,
 )
+from app.utilities.cache import LRUCache
 from app.utilities.config import CONFIG
+from app.utilities.query_cache import query_cache
 
 
 def get_orm_filter_criterion(
@@ -47,14 +65,39 @@ def get_orm_filter_criterion(
     return filter_criterion
 
 
+@dataclass
+class QueryPlan:
+    """Value independent part of a lazyload statement, shared by request shape."""
+
+    select_query: Select
+    columns: dict[str, ColumnElement]
+    aggregated: dict[str, bool]
+
+
+query_plans = LRUCache(maxsize=CONFIG.QUERY_CACHE.PLAN_SIZE)
+
+
+def build_query_plan(select_query: Select) -> QueryPlan:
+    columns = {}
+    for k, v in select_query.selected_columns.items():
+        columns.setdefault(k, v)
+    return QueryPlan(
+        select_query=select_query,
+        columns=columns,
+        aggregated={k: has_aggregation_function(v) for k, v in columns.items()},
+    )
+
+
 def handle_filters(
     select_query: Select,
     filters: list[FilterModel] = None,
+    plan: QueryPlan = None,
 ) -> Select:
     filters = [] if filters is None else filters
     if not filters:
         return select_query
 
+    plan = build_query_plan(select_query) if plan is None else plan
     filter_criterion = []
     having_criterion = []
 
@@ -66,8 +109,8 @@ def handle_filters(
                 or_(
                     *[
                         operator_handler(v, filter_model.value)
-                        for _, v in select_query.selected_columns.items()
-                        if has_aggregation_function(v)
+                        for k, v in plan.columns.items()
+                        if plan.aggregated[k]
                     ]
                 )
             )
@@ -75,23 +118,14 @@ def handle_filters(
                 or_(
                     *[
                         operator_handler(v, filter_model.value)
-                        for _, v in select_query.selected_columns.items()
-                        if not has_aggregation_function(v)
+                        for k, v in plan.columns.items()
+                        if not plan.aggregated[k]
                     ]
                 )
             )
         else:
             # Find column from select query
-            select_column = next(
-                iter(
-                    [
-                        v
-                        for k, v in select_query.selected_columns.items()
-                        if k == filter_model.field
-                    ]
-                ),
-                None,
-            )
+            select_column = plan.columns.get(filter_model.field)
             if select_column is None:
                 raise LogicException(
                     f"Filtering is not supported for field `{filter_model.field}`"
@@ -99,7 +133,7 @@ def handle_filters(
 
             # Generate filtering criteria
             operator_handler = FilterOperator.get_handler(filter_model.operator)
-            if has_aggregation_function(select_column):
+            if plan.aggregated[filter_model.field]:
                 having_criterion.append(
                     operator_handler(select_column, filter_model.value)
                 )
@@ -117,19 +151,12 @@ def handle_filters(
 def handle_sort(
     select_query: Select,
     sort: SortModel = None,
+    plan: QueryPlan = None,
 ) -> Select:
     if sort is not None and sort.order_by is not None:
         # Find column from select query
-        select_column = next(
-            iter(
-                [
-                    v
-                    for k, v in select_query.selected_columns.items()
-                    if k == sort.order_by
-                ]
-            ),
-            None,
-        )
+        plan = build_query_plan(select_query) if plan is None else plan
+        select_column = plan.columns.get(sort.order_by)
         if select_column is None:
             raise LogicException(
                 f"Sorting is not supported for field `{sort.order_by}`"
@@ -141,22 +168,158 @@ def handle_sort(
     return select_query
 
 
-def handle_pagination(
+def get_keyset_columns(
+    select_query: Union[Select, CompoundSelect],
+    sort: SortModel = None,
+) -> list[ColumnElement]:
+    """Returns the `(sort column, id)` keyset, or just `(id)` when sorting by id."""
+    keys = ["id"]
+    if sort is not None and sort.order_by not in (None, "id"):
+        keys.insert(0, sort.order_by)
+
+    columns = select_query.selected_columns
+    missing = [x for x in keys if x not in columns]
+    if missing:
+        raise LogicException(
+            "Keyset pagination requires the `id` and sort fields to be selected",
+            extra={"missing": missing},
+        )
+    return [columns[x] for x in keys]
+
+
+def parse_keyset_value(value: Any, column: ColumnElement) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return value
+
+
+def get_keyset_predicate(
+    columns: list[ColumnElement],
+    values: list[Any],
+    descending: bool = False,
+) -> ColumnElement:
+    after = ColumnOperators.__lt__ if descending else ColumnOperators.__gt__
+    id_column, id_value = columns[-1], values[-1]
+    if len(columns) == 1:
+        return after(id_column, id_value)
+
+    # Row-value seek; NULL sort keys come last ascending and first descending
+    sort_column, sort_value = columns[0], values[0]
+    if sort_value is None:
+        seek = and_(sort_column.is_(None), after(id_column, id_value))
+        return or_(seek, sort_column.isnot(None)) if descending else seek
+    seek = after(tuple_(sort_column, id_column), (sort_value, id_value))
+    return seek if descending else or_(seek, sort_column.is_(None))
+
+
+def handle_keyset_seek(
+    select_query: Select,
+    pagination: PaginateModel = None,
+    sort: SortModel = None,
+) -> Select:
+    if pagination is None or pagination.mode != PaginationMode.KEYSET:
+        return select_query
+
+    # Validated even on the first page, the next cursor needs these columns
+    columns = get_keyset_columns(select_query, sort)
+    if pagination.cursor is None:
+        return select_query
+    values = decode_cursor(pagination.cursor, sort.order_by if sort else None)
+    if values is None or len(values) != len(columns):
+        raise LogicException("INVALID_PAGINATION_CURSOR")
+    values = [parse_keyset_value(v, c) for v, c in zip(values, columns)]
+
+    predicate = get_keyset_predicate(
+        columns=columns,
+        values=values,
+        descending=sort is not None and sort.sort_order == SortOrder.DESCENDING,
+    )
+    if any(has_aggregation_function(x) for x in columns):
+        return select_query.having(predicate)
+    return select_query.filter(predicate)
+
+
+def get_next_cursor(
+    rows: list[Row],
+    pagination: PaginateModel = None,
+    sort: SortModel = None,
+    has_more: Optional[bool] = None,
+) -> Optional[str]:
+    # A short page is the last one
+    if (
+        pagination is None
+        or pagination.mode != PaginationMode.KEYSET
+        or pagination.limit < 1
+        or len(rows) < pagination.limit
+        or has_more is False
+    ):
+        return None
+    order_by = sort.order_by if sort else None
+    keys = ["id"] if order_by in (None, "id") else [order_by, "id"]
+    # pylint: disable-next=protected-access
+    return encode_cursor(order_by, [rows[-1]._mapping[x] for x in keys])
+
+
+def handle_pagination_order(
+    select_query: Select,
+    pagination: PaginateModel = None,
+    sort: SortModel = None,
+) -> Select:
+    if pagination.limit < 1 or pagination.mode != PaginationMode.KEYSET:
+        return select_query
+    # Tie-break on id, the seek predicate itself is added by lazyload_data
+    if sort is not None and sort.order_by == "id":
+        select_query = select_query.order_by(None)
+    id_column = get_keyset_columns(select_query, sort)[-1]
+    sort_order = (
+        desc if sort is not None and sort.sort_order == SortOrder.DESCENDING else asc
+    )
+    return select_query.order_by(sort_order(id_column))
+
+
+def handle_pagination_limit(
     select_query: Select,
     pagination: PaginateModel = None,
     for_union: bool = False,
 ) -> Select:
     if pagination.limit < 1:
         return select_query
-    if pagination.page == 0:
-        return select_query.limit(literal_column(f"{pagination.limit}"))
-    if pagination:
-        limit = pagination.limit * pagination.page if for_union else pagination.limit
-        offset = 0 if for_union else pagination.limit * (pagination.page - 1)
-        return select_query.limit(literal_column(f"{limit}")).offset(
-            literal_column(f"{offset}")
-        )
-    return select_query
+    # One extra row tells whether another page exists without a COUNT
+    lookahead = int(pagination.count_strategy == CountStrategy.HAS_MORE)
+    # Plain ints are bound parameters, so every page shares one compiled statement
+    if pagination.mode == PaginationMode.KEYSET or pagination.page == 0:
+        return select_query.limit(pagination.limit + lookahead)
+    limit = (
+        pagination.limit * pagination.page if for_union else pagination.limit
+    ) + lookahead
+    offset = 0 if for_union else pagination.limit * (pagination.page - 1)
+    return select_query.limit(limit).offset(offset)
+
+
+def handle_pagination(
+    select_query: Select,
+    pagination: PaginateModel = None,
+    for_union: bool = False,
+    sort: SortModel = None,
+) -> Select:
+    select_query = handle_pagination_order(
+        select_query=select_query,
+        pagination=pagination,
+        sort=sort,
+    )
+    return handle_pagination_limit(
+        select_query=select_query,
+        pagination=pagination,
+        for_union=for_union,
+    )
 
 
 def handle_included_columns(
@@ -182,39 +345,89 @@ def handle_excluded_columns(
     return select_query
 
 
-def handle_pre_lazyloading(
+def get_query_plan(
     select_query: Select,
-    filters: list[FilterModel] = None,
     pagination: PaginateModel = None,
     sort: SortModel = None,
     included_fields: list[str] = None,
     excluded_fields: list[str] = None,
-    for_union: bool = False,
     export: bool = False,
-) -> Select:
-    select_query = handle_filters(
-        select_query=select_query,
-        filters=filters,
-    )
+) -> QueryPlan:
+    """Returns the sorted, ordered and projected statement for the request shape."""
+    paginated = pagination is not None and not export and pagination.limit >= 1
+    # pylint: disable-next=protected-access
+    cache_key = select_query._generate_cache_key()
+    key = None
+    # Statements carrying bound values of their own are never shared
+    if cache_key is not None and not cache_key.bindparams:
+        key = (
+            cache_key.key,
+            sort.order_by if sort else None,
+            sort.sort_order if sort else None,
+            pagination.mode if paginated else None,
+            tuple(sorted(included_fields or [])),
+            tuple(sorted(excluded_fields or [])),
+        )
+        plan = query_plans.get(key)
+        if plan is not None:
+            return plan
+
+    plan = build_query_plan(select_query)
     select_query = handle_sort(
         select_query=select_query,
         sort=sort,
+        plan=plan,
     )
-    # No pagination for data export
-    if pagination and not export:
-        select_query = handle_pagination(
+    if paginated:
+        select_query = handle_pagination_order(
             select_query=select_query,
             pagination=pagination,
-            for_union=for_union,
+            sort=sort,
         )
     select_query = handle_included_columns(
         select_query=select_query,
         included_fields=included_fields,
     )
-    select_query = handle_excluded_columns(
+    plan.select_query = handle_excluded_columns(
+        select_query=select_query,
+        excluded_fields=excluded_fields,
+    )
+    if key is not None:
+        query_plans.set(key, plan)
+    return plan
+
+
+def handle_pre_lazyloading(
+    select_query: Select,
+    filters: list[FilterModel] = None,
+    pagination: PaginateModel = None,
+    sort: SortModel = None,
+    included_fields: list[str] = None,
+    excluded_fields: list[str] = None,
+    for_union: bool = False,
+    export: bool = False,
+) -> Select:
+    plan = get_query_plan(
         select_query=select_query,
+        pagination=pagination,
+        sort=sort,
+        included_fields=included_fields,
         excluded_fields=excluded_fields,
+        export=export,
+    )
+    # Only the value carrying parts are built per request
+    select_query = handle_filters(
+        select_query=plan.select_query,
+        filters=filters,
+        plan=plan,
     )
+    # No pagination for data export
+    if pagination and not export:
+        select_query = handle_pagination_limit(
+            select_query=select_query,
+            pagination=pagination,
+            for_union=for_union,
+        )
     return select_query
 
 
@@ -267,6 +480,7 @@ async def optimized_lazyload_union_data(
     included_fields: list[str] = None,
     excluded_fields: list[str] = None,
     export: bool = False,
+    cache: bool = False,
 ) -> LazyLoadResult:
     select_queries = []
 
@@ -316,6 +530,7 @@ async def optimized_lazyload_union_data(
             included_fields=included_fields,
             excluded_fields=excluded_fields,
             export=export,
+            cache=cache,
         )
 
     return await lazyload_union_data(
@@ -327,6 +542,7 @@ async def optimized_lazyload_union_data(
         included_fields=included_fields,
         excluded_fields=excluded_fields,
         export=export,
+        cache=cache,
     )
 
 
@@ -339,6 +555,7 @@ async def lazyload_union_data(
     included_fields: list[str] = None,
     excluded_fields: list[str] = None,
     export: bool = False,
+    cache: bool = False,
 ) -> LazyLoadResult:
     # Validate number of SELECT statements
     if len(select_queries) <= 1:
@@ -373,6 +590,12 @@ async def lazyload_union_data(
         for select_query in select_queries
     ]
 
+    if not export:
+        select_queries = [
+            handle_keyset_seek(x, pagination=pagination, sort=sort)
+            for x in select_queries
+        ]
+
     select_query = union_all(*select_queries)
     count_query = select(reduce(ColumnOperators.__add__, count_queries).label("count"))
 
@@ -383,7 +606,87 @@ async def lazyload_union_data(
         sort=sort,
         pagination=pagination,
         export=export,
+        cache=cache,
+    )
+
+
+def get_count_strategy(
+    pagination: PaginateModel = None,
+    export: bool = False,
+) -> CountStrategy:
+    # The export limit check always needs the exact count
+    if export or pagination is None or pagination.count_strategy is None:
+        return CountStrategy.EXACT
+    strategy = CountStrategy(pagination.count_strategy)
+    if strategy == CountStrategy.HAS_MORE and pagination.limit < 1:
+        return CountStrategy.NONE
+    return strategy
+
+
+async def get_session_engine(async_db: AsyncSession) -> AsyncEngine:
+    """
+    Engine the session reads from; replica sessions have no `bind` and pick
+    theirs on first use, so this pins it.
+    """
+    connection = await async_db.connection()
+    return connection.engine
+
+
+async def execute_count(
+    engine: AsyncEngine,
+    count_query: Union[Select, CompoundSelect],
+) -> int:
+    # Own pooled connection, so the COUNT runs alongside the page query
+    async with AsyncSession(bind=engine) as count_db:
+        count_result = await count_db.execute(count_query)
+        return count_result.scalar()
+
+
+async def estimate_count(
+    async_db: AsyncSession,
+    select_query: Union[Select, CompoundSelect],
+) -> Optional[int]:
+    """Returns the planner's row estimate, or None if it is not available."""
+    connection = await async_db.connection()
+    if connection.dialect.name != "postgresql" or not isinstance(select_query, Select):
+        return None
+
+    # pylint: disable-next=protected-access
+    is_grouped = bool(select_query._group_by_clauses or select_query._having_criteria)
+    froms = select_query.get_final_froms()
+    if (
+        select_query.whereclause is None
+        and not is_grouped
+        and len(froms) == 1
+        and isinstance(froms[0], Table)
+    ):
+        result = await async_db.execute(
+            text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:name AS regclass)"
+            ),
+            {"name": froms[0].fullname},
+        )
+        # Never analyzed tables report -1
+        reltuples = result.scalar()
+        if reltuples is not None and reltuples >= 0:
+            return reltuples
+
+    compiled = (
+        select_query.limit(None)
+        .offset(None)
+        .order_by(None)
+        .compile(dialect=connection.dialect)
+    )
+    params = compiled.construct_params()
+    if compiled.positiontup:
+        params = tuple(params[x] for x in compiled.positiontup)
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}",
+        params,
     )
+    plan = result.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 async def lazyload_data(
@@ -396,6 +699,7 @@ async def lazyload_data(
     included_fields: list[str] = None,
     excluded_fields: list[str] = None,
     export: bool = False,
+    cache: bool = False,
 ) -> LazyLoadResult:
     # Handle pre-processing for lazy-loading (filters, sorting, etc.)
     select_query = handle_pre_lazyloading(
@@ -415,30 +719,86 @@ async def lazyload_data(
     elif isinstance(select_query, Select):
         count_query = count_query.filter(select_query.whereclause)
 
-    select_result = await async_db.execute(select_query)
-    count_result = await async_db.execute(count_query)
-
-    count = (
-        count_result.scalar()
-        if not pagination
-        else (
-            count_result.scalar()
-            if pagination.page > 0 or pagination.limit < 1
-            else min(count_result.scalar(), pagination.limit)
+    # Seek after building the COUNT statement so it still counts every page
+    unseeked_query = select_query
+    if isinstance(select_query, Select) and not export:
+        select_query = handle_keyset_seek(
+            select_query=select_query,
+            pagination=pagination,
+            sort=sort,
         )
-    )
 
-    if export and count > int(CONFIG.OTHER.DATA_EXPORT_LIMIT):
-        raise LogicException(
-            "DATA_EXPORT_EXCEED_LIMIT",
-            extra={"count": count},
+    count_strategy = get_count_strategy(pagination=pagination, export=export)
+
+    # Exports are streamed and never cached
+    cache_key = None
+    if cache and not export and query_cache.enabled:
+        cache_key = await query_cache.get_key(
+            dialect=async_db.sync_session.get_bind().dialect,
+            statements=[select_query, count_query],
+            extra=[count_strategy, pagination.model_dump() if pagination else None],
+        )
+        cached_result = await query_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+    # Exported rows are streamed by the response instead of loaded here
+    if export:
+        count_result = await async_db.execute(count_query)
+        count = count_result.scalar()
+        if count > CONFIG.OTHER.DATA_EXPORT_LIMIT:
+            raise LogicException(
+                "DATA_EXPORT_EXCEED_LIMIT",
+                extra={"count": count},
+            )
+        return LazyLoadResult(
+            columns=[x.name for x in select_query.selected_columns],
+            data=[],
+            count=count,
+            select_query=select_query,
         )
 
-    return LazyLoadResult(
+    if count_strategy == CountStrategy.EXACT:
+        # Same engine, so the count and the page read the same replica
+        engine = await get_session_engine(async_db)
+        select_result, count = await asyncio.gather(
+            async_db.execute(select_query),
+            execute_count(engine, count_query),
+        )
+    else:
+        select_result = await async_db.execute(select_query)
+        count = None
+        if count_strategy == CountStrategy.ESTIMATE:
+            # Estimated before the seek, so it agrees with the exact total
+            count = await estimate_count(async_db, unseeked_query)
+            if count is None:
+                engine = await get_session_engine(async_db)
+                count = await execute_count(engine, count_query)
+
+    if count is not None and pagination and pagination.page == 0:
+        count = min(count, pagination.limit) if pagination.limit > 0 else count
+
+    rows = select_result.all()
+    has_more = None
+    if count_strategy == CountStrategy.HAS_MORE:
+        has_more = len(rows) > pagination.limit
+        rows = rows[: pagination.limit]
+
+    result = LazyLoadResult(
         columns=[x.name for x in select_query.selected_columns],
-        data=select_result.all(),
+        data=rows,
         count=count,
+        has_more=has_more,
+        next_cursor=get_next_cursor(
+            rows,
+            pagination=pagination,
+            sort=sort,
+            has_more=has_more,
+        ),
     )
+    if cache_key is not None:
+        await query_cache.set(cache_key, result)
+    return result
 
 
 def get_detailed_row(
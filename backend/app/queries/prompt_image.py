@@ -1,20 +1,66 @@
+import csv
+import io
 from typing import Optional, List
-from sqlalchemy import BinaryExpression, ColumnOperators
+import numpy as np
+from sqlalchemy import (
+    BinaryExpression,
+    ColumnOperators,
+    bindparam,
+    column,
+    insert,
+    inspect,
+    literal_column,
+    or_,
+    table,
+    text,
+)
 from sqlalchemy.orm import Session
+from sqlalchemy.engine.row import Row
 from app.models.databases.orm.prompt_image import PromptImage
+from app.models.databases.orm.types import Vector
 from app.models.databases.queries.base import FilterModel, PaginateModel, SortModel
 from app.queries.base import lazyload_data
+from app.utilities.cache import LRUCache
+from app.utilities.config import CONFIG
+from app.utilities.postgresql import replica_router
+from app.utilities.query_cache import query_cache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.databases.queries.prompt_image import (
     LazyloadPromptImageResultModel,
 )
 
+# The pgvector column is optional and only exists when its migration could run,
+# so it is referenced by name instead of being mapped on `PromptImage`
+PROMPT_IMAGE_PGVECTOR = literal_column(
+    "prompt_images.embedding_pgvector",
+    type_=Vector(384),
+)
+PGVECTOR_STATUS = {}
+# Normalized prompt fingerprint -> public prompt image, dropped on every save
+exact_prompt_cache = LRUCache(maxsize=CONFIG.PROMPT_CACHE.SIZE)
+PGVECTOR_COLUMN_QUERY = text(
+    "SELECT 1 FROM information_schema.columns "
+    "WHERE table_name = 'prompt_images' "
+    "AND column_name = 'embedding_pgvector'"
+)
+# Columns written by the bulk import, the rest come from server defaults
+PROMPT_IMAGE_IMPORT_COLUMNS = [
+    "user_id",
+    "prompt_text",
+    "prompt_hash",
+    "embedding",
+    "image_url",
+    "is_public",
+    "key_word",
+]
+
 
 def get_prompt_image_filter_criterion(
     prompt_image_id: int = None,
     user_id: int = None,
     prompt_text: str = None,
+    prompt_hash: str = None,
     key_word: str = None,
     is_public: bool = None,
 ) -> List[BinaryExpression]:
@@ -34,6 +80,11 @@ def get_prompt_image_filter_criterion(
             if prompt_text is None
             else PromptImage.prompt_text.ilike(f"%{prompt_text}%")
         ),
+        (
+            None
+            if prompt_hash is None
+            else ColumnOperators.__eq__(PromptImage.prompt_hash, prompt_hash)
+        ),
         (None if key_word is None else PromptImage.key_word.ilike(f"%{key_word}%")),
         (
             None
@@ -44,52 +95,138 @@ def get_prompt_image_filter_criterion(
     return [x for x in criterion if x is not None]
 
 
-def get_prompt_images(
+def get_prompt_image_embeddings(
     db: Session,
-    user_id: int = None,
-    prompt_text: str = None,
-    key_word: str = None,
     is_public: bool = None,
-) -> List[PromptImage]:
-    criterion = get_prompt_image_filter_criterion(
-        user_id=user_id,
-        prompt_text=prompt_text,
-        key_word=key_word,
-        is_public=is_public,
+    min_id: int = None,
+) -> List[Row]:
+    criterion = get_prompt_image_filter_criterion(is_public=is_public)
+    if min_id is not None:
+        criterion.append(ColumnOperators.__gt__(PromptImage.id, min_id))
+    return (
+        db.query(PromptImage.id, PromptImage.embedding)
+        .filter(*criterion)
+        .order_by(PromptImage.id)
+        .all()
     )
-    return db.query(PromptImage).filter(*criterion).all()
 
 
-def get_prompt_image(
-    db: Session,
-    prompt_image_id: int = None,
-    user_id: int = None,
-    prompt_text: str = None,
-    key_word: str = None,
-    is_public: bool = None,
-) -> Optional[PromptImage]:
-    criterion = get_prompt_image_filter_criterion(
-        prompt_image_id=prompt_image_id,
-        user_id=user_id,
-        prompt_text=prompt_text,
-        key_word=key_word,
-        is_public=is_public,
-    )
-    return db.query(PromptImage).filter(*criterion).one_or_none()
+def get_prompt_hashes(prompt_image: PromptImage) -> set[str]:
+    """Current and, when the prompt changed, previous hash of an unsaved row."""
+    history = inspect(prompt_image).attrs.prompt_hash.history
+    return {x for x in [*history.sum(), *history.deleted] if x}
+
+
+def invalidate_exact_prompt_images(prompt_hashes: set[str]):
+    # Saved content or visibility may no longer match the cached response
+    for prompt_hash in prompt_hashes - {None}:
+        exact_prompt_cache.delete(prompt_hash)
 
 
 def save_prompt_image(
-    db: Session, prompt_image: PromptImage, auto_commit: bool = True
+    db: Session,
+    prompt_image: PromptImage,
+    auto_commit: bool = True,
+    embedding_pgvector: np.ndarray = None,
 ) -> PromptImage:
+    prompt_hashes = get_prompt_hashes(prompt_image)
     db.add(prompt_image)
+    if embedding_pgvector is not None:
+        db.flush()
+        db.execute(
+            text(
+                "UPDATE prompt_images SET embedding_pgvector = :embedding "
+                "WHERE id = :id"
+            ).bindparams(bindparam("embedding", type_=Vector(384))),
+            {"id": prompt_image.id, "embedding": embedding_pgvector},
+        )
     if auto_commit:
         db.commit()
         db.refresh(prompt_image)
     else:
         db.flush()
+    query_cache.invalidate_sync(PromptImage.__tablename__)
+    invalidate_exact_prompt_images({*prompt_hashes, prompt_image.prompt_hash})
+    replica_router.record_write(prompt_image.user_id)
     return prompt_image
 
 
+async def save_prompt_image_async(
+    async_db: AsyncSession,
+    prompt_image: PromptImage,
+    auto_commit: bool = True,
+    embedding_pgvector: np.ndarray = None,
+) -> PromptImage:
+    prompt_hashes = get_prompt_hashes(prompt_image)
+    async_db.add(prompt_image)
+    if embedding_pgvector is not None:
+        await async_db.flush()
+        await async_db.execute(
+            text(
+                "UPDATE prompt_images SET embedding_pgvector = :embedding "
+                "WHERE id = :id"
+            ).bindparams(bindparam("embedding", type_=Vector(384))),
+            {"id": prompt_image.id, "embedding": embedding_pgvector},
+        )
+    if auto_commit:
+        await async_db.commit()
+        await async_db.refresh(prompt_image)
+    else:
+        await async_db.flush()
+    await query_cache.invalidate(PromptImage.__tablename__)
+    invalidate_exact_prompt_images({*prompt_hashes, prompt_image.prompt_hash})
+    replica_router.record_write(prompt_image.user_id)
+    return prompt_image
+
+
+async def get_prompt_image_by_hash(
+    async_db: AsyncSession,
+    prompt_hash: str,
+    is_public: bool = None,
+) -> Optional[PromptImage]:
+    criterion = get_prompt_image_filter_criterion(
+        prompt_hash=prompt_hash,
+        is_public=is_public,
+    )
+    result = await async_db.execute(
+        select(PromptImage).filter(*criterion).order_by(PromptImage.id).limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def is_pgvector_enabled(async_db: AsyncSession) -> bool:
+    """Checks once per process whether the pgvector column exists."""
+    if "enabled" not in PGVECTOR_STATUS:
+        result = await async_db.execute(PGVECTOR_COLUMN_QUERY)
+        PGVECTOR_STATUS["enabled"] = result.scalar() is not None
+    return PGVECTOR_STATUS["enabled"]
+
+
+def has_pgvector_column(db: Session) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    return db.execute(PGVECTOR_COLUMN_QUERY).scalar() is not None
+
+
+async def get_nearest_prompt_images(
+    async_db: AsyncSession,
+    embedding: np.ndarray,
+    limit: int = 1,
+    is_public: bool = None,
+) -> List[Row]:
+    """Returns `(PromptImage, cosine distance)` rows closest to `embedding`."""
+    criterion = get_prompt_image_filter_criterion(is_public=is_public)
+    distance = PROMPT_IMAGE_PGVECTOR.cosine_distance(embedding)
+    select_query = (
+        select(PromptImage, distance.label("distance"))
+        .filter(*criterion, PROMPT_IMAGE_PGVECTOR.isnot(None))
+        .order_by(distance)
+        .limit(limit)
+    )
+    result = await async_db.execute(select_query)
+    return result.all()
+
+
 async def lazyload_prompt_images(
     async_db: AsyncSession,
     filters: list[FilterModel],
@@ -121,6 +258,92 @@ async def lazyload_prompt_images(
         included_fields=included_fields,
         excluded_fields=excluded_fields,
         export=export,
+        cache=True,
     )
 
     return LazyloadPromptImageResultModel(**results.__dict__)
+
+
+def get_existing_prompt_hashes(
+    db: Session,
+    prompt_hashes: list[str],
+    user_id: int,
+) -> set[str]:
+    """Hashes already saved as public images or by `user_id`."""
+    rows = (
+        db.query(PromptImage.prompt_hash)
+        .filter(
+            PromptImage.prompt_hash.in_(prompt_hashes),
+            or_(
+                ColumnOperators.__eq__(PromptImage.is_public, True),
+                ColumnOperators.__eq__(PromptImage.user_id, user_id),
+            ),
+        )
+        .all()
+    )
+    return {x.prompt_hash for x in rows}
+
+
+def get_prompt_image_import_columns(with_pgvector: bool = False) -> list[str]:
+    columns = list(PROMPT_IMAGE_IMPORT_COLUMNS)
+    if with_pgvector:
+        columns.append("embedding_pgvector")
+    return columns
+
+
+def bulk_insert_prompt_images(
+    db: Session,
+    rows: list[dict],
+    with_pgvector: bool = False,
+):
+    """Inserts `rows` with batched multi-row `INSERT ... VALUES` statements."""
+    table_columns = PromptImage.__table__.columns
+    prompt_images = table(
+        PromptImage.__tablename__,
+        *[
+            column(
+                x, Vector(384) if x == "embedding_pgvector" else table_columns[x].type
+            )
+            for x in get_prompt_image_import_columns(with_pgvector)
+        ],
+    )
+    db.execute(insert(prompt_images), rows)
+    query_cache.invalidate_sync(PromptImage.__tablename__)
+
+
+def to_copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        return "\\x" + value.hex()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, np.ndarray):
+        return str(value.tolist())
+    return value
+
+
+def copy_prompt_images(
+    db: Session,
+    rows: list[dict],
+    with_pgvector: bool = False,
+):
+    """Loads `rows` with `COPY ... FROM STDIN`, needs PostgreSQL and psycopg2."""
+    columns = get_prompt_image_import_columns(with_pgvector)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([to_copy_value(row[x]) for x in columns])
+    buffer.seek(0)
+
+    # Same connection and transaction as the session
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {PromptImage.__tablename__} ({', '.join(columns)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+    query_cache.invalidate_sync(PromptImage.__tablename__)
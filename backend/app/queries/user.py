@@ -1,8 +1,11 @@
 from typing import Optional
-from sqlalchemy import BinaryExpression, ColumnOperators, func
+from sqlalchemy import BinaryExpression, ColumnOperators, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.databases.orm.user import User
 from app.models.exceptions.not_found_exception import NotFoundException
+from app.utilities.postgresql import replica_router
+from app.utilities.user_cache import user_cache
 
 
 def get_user_filter_criterion(
@@ -46,8 +49,27 @@ def get_user(
     return db_user
 
 
+async def get_user_async(
+    async_db: AsyncSession,
+    user_id: int = None,
+    email: str = None,
+    optional: bool = False,
+) -> Optional[User]:
+    criterion = get_user_filter_criterion(user_id=user_id, email=email)
+    result = await async_db.execute(select(User).filter(*criterion))
+    db_user = result.scalar_one_or_none()
+
+    if db_user is None and not optional:
+        raise NotFoundException(
+            "USER_NOT_FOUND", extra={"user_id": user_id, "email": email}
+        )
+    return db_user
+
+
 def save_user(db: Session, user: User, auto_commit: bool = True) -> User:
     db.add(user)
     db.commit() if auto_commit else db.flush()
     db.refresh(user)
+    user_cache.invalidate(user.id)
+    replica_router.record_write(user.id)
     return user
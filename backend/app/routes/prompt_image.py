@@ -2,7 +2,10 @@ from fastapi import APIRouter
 from app.models.routes.api_route import InterceptorAPIRoute
 from app.controllers.prompt_image import (
     create_prompt_image,
+    embed_prompts,
+    get_prompt_image_job,
     lazyload_prompt_images,
+    stream_prompt_image_job,
 )
 
 router = APIRouter(route_class=InterceptorAPIRoute)
@@ -13,6 +16,24 @@ router.add_api_route(
     methods=["POST"],
 )
 
+router.add_api_route(
+    "/jobs/{job_id}",
+    get_prompt_image_job,
+    methods=["GET"],
+)
+
+router.add_api_route(
+    "/jobs/{job_id}/events",
+    stream_prompt_image_job,
+    methods=["GET"],
+)
+
+router.add_api_route(
+    "/embed-batch",
+    embed_prompts,
+    methods=["POST"],
+)
+
 router.add_api_route(
     "s",
     lazyload_prompt_images,
@@ -1,12 +1,16 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.utilities.postgresql import get_db
-from sqlalchemy.orm import Session
+from app.utilities.config import CONFIG
+from app.utilities.contextvar import contextvar_session_user_id
+from app.utilities.executor import BoundedExecutor, ExecutorSaturated
+from app.utilities.postgresql import get_async_db
+from app.utilities.user_cache import user_cache
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
-from app.queries.user import get_user
+from app.queries.user import get_user_async
 from app.models.databases.orm.user import User
 import os
 
@@ -15,6 +19,11 @@ PWD_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
 ALGORITHM = os.environ.get("JWT_ALGORITHM")
 security = HTTPBearer()
+password_executor = BoundedExecutor(
+    max_workers=CONFIG.AUTH.HASH_MAX_WORKERS,
+    max_queue=CONFIG.AUTH.HASH_MAX_QUEUE,
+    name="password",
+)
 
 
 def hash_password(password: str) -> str:
@@ -46,6 +55,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+async def run_password_hashing(func, *args):
+    """Runs bcrypt on the password pool, 503 with Retry-After when it is full."""
+    try:
+        return await password_executor.run(func, *args)
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_hashing(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_hashing(verify_password, plain_password, hashed_password)
+
+
 def create_tokens(user_id: int) -> tuple[str, str]:
     if not SECRET_KEY or not ALGORITHM:
         raise RuntimeError("JWT Environment variables are missing")
@@ -93,25 +122,52 @@ def decode_refresh_token(token: str) -> int:
     return decode_token(token, expected_type="refresh")
 
 
-def get_current_user(
+def get_access_token_user_id(token: str) -> int:
+    """`decode_token` for access tokens, memoized while the token is valid."""
+    user_id = user_cache.get_token(token)
+    if user_id is None:
+        user_id = decode_token(token, expected_type="access")
+        user_cache.set_token(token, user_id, jwt.get_unverified_claims(token)["exp"])
+    # Read-only sessions of this request route by it, see `ReplicaRouter`
+    contextvar_session_user_id.set(user_id)
+    return user_id
+
+
+def to_user_snapshot(user: User) -> dict:
+    """Column values without the password hash, safe to share between workers."""
+    return {
+        x.key: getattr(user, x.key)
+        for x in User.__table__.columns
+        if x.key != "password"
+    }
+
+
+def raise_user_not_found():
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_user_async(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db),
 ) -> User:
     """
     1. Swagger/Frontend sends 'Authorization: Bearer <token>'
     2. HTTPBearer extracts the <token> part into credentials.credentials
-    3. We decode and verify it.
+    3. We decode and verify it, then load the user, both cached for a short TTL.
+    A cached user is a detached `User` without the password or relationships.
     """
-    token = credentials.credentials
+    user_id = get_access_token_user_id(credentials.credentials)
 
-    # This calls your service logic (Signature check, Expiry check)
-    user_id = decode_token(token, expected_type="access")
+    snapshot = await user_cache.get_user_async(user_id)
+    if snapshot is not None:
+        return User(**snapshot)
 
-    user = get_user(db, user_id=user_id, optional=True)
+    user = await get_user_async(async_db, user_id=user_id, optional=True)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise_user_not_found()
+    await user_cache.set_user_async(user_id, to_user_snapshot(user))
     return user
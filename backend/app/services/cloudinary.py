@@ -1,7 +1,9 @@
+import time
 import cloudinary
-import cloudinary.uploader
+import cloudinary.utils
 import os
 from dotenv import load_dotenv
+from app.utilities.http_client import http_clients
 
 load_dotenv()
 
@@ -13,10 +15,25 @@ cloudinary.config(
 )
 
 
-def upload_image_to_cloud(image_bytes: bytes, folder: str = "prompts") -> str:
-    """Uploads bytes directly to Cloudinary."""
-    # The Python SDK can take raw bytes directly
-    upload_result = cloudinary.uploader.upload(
-        image_bytes, folder=folder, resource_type="image"
+http_clients.register("cloudinary", read_timeout=60.0)
+
+
+async def upload_image_to_cloud_async(
+    image_bytes: bytes, folder: str = "prompts"
+) -> str:
+    """Uploads bytes to Cloudinary's REST API without blocking the event loop."""
+    config = cloudinary.config()
+    params = {"folder": folder, "timestamp": int(time.time())}
+    params["signature"] = cloudinary.utils.api_sign_request(params, config.api_secret)
+    params["api_key"] = config.api_key
+
+    response = await http_clients.request(
+        "cloudinary",
+        "POST",
+        cloudinary.utils.cloudinary_api_url("upload", resource_type="image"),
+        data=params,
+        files={"file": ("image", image_bytes)},
     )
-    return upload_result.get("secure_url")
+    if response.status_code != 200:
+        raise Exception(f"Cloudinary Error ({response.status_code}): {response.text}")
+    return response.json().get("secure_url")
@@ -1,23 +1,390 @@
+import asyncio
+import importlib.util
+import json
+import socket
+import struct
+import threading
+import time
+from typing import Optional, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from app.utilities.batcher import MicroBatcher
+from app.utilities.config import CONFIG
+from app.utilities.embedding_cache import EmbeddingCache, SQLiteEmbeddingStore
+from app.utilities.executor import run_blocking
+from app.utilities.logger import logger
+from app.utilities.text import fingerprint_prompt
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
 SIMILARITY_THRESHOLD = 0.8
+# Embeddings are stored as raw little-endian float32 bytes
+EMBEDDING_DTYPE = np.dtype("<f4")
+# Embedding server frames: 4-byte big-endian length, then the payload
+FRAME_HEADER = struct.Struct(">I")
 
 
-def generate_embedding(text: str) -> str:
-    """Converts prompt text into a stringified JSON list of floats."""
-    embedding = model.encode(text)
-    return str(embedding.tolist())
+class EmbeddingModel:
+    """
+    SentenceTransformer (PyTorch) backend, loaded by `load` (or the first
+    encode) instead of at import, so processes that never encode skip the
+    torch import entirely. Other backends override `_load`.
+    """
 
+    backend = "sentence-transformers"
 
-def calculate_similarity(embedding_a: str, embedding_b: str) -> float:
-    """Calculates cosine similarity between two stringified embeddings."""
-    vec_a = np.array(eval(embedding_a))
-    vec_b = np.array(eval(embedding_b))
+    def __init__(self, name: str):
+        self.name = name
+        self.is_ready = False
+        self.timings = {}
+        self._model = None
+        self._lock = threading.Lock()
 
-    dot_product = np.dot(vec_a, vec_b)
-    norm_a = np.linalg.norm(vec_a)
-    norm_b = np.linalg.norm(vec_b)
+    def _load(self, sentence_transformer: type):
+        return sentence_transformer(self.name)
 
-    return dot_product / (norm_a * norm_b)
+    def load(self):
+        with self._lock:
+            if self._model is None:
+                started = time.perf_counter()
+                # pylint: disable-next=import-outside-toplevel
+                from sentence_transformers import SentenceTransformer
+
+                self.timings["import_seconds"] = time.perf_counter() - started
+                started = time.perf_counter()
+                self._model = self._load(SentenceTransformer)
+                self.timings["load_seconds"] = time.perf_counter() - started
+        return self._model
+
+    @property
+    def identity(self) -> str:
+        """Everything the vectors depend on, namespaces the persistent cache."""
+        return f"{self.name}:{self.backend}"
+
+    def encode(self, texts: list[str], batch_size: int = None) -> np.ndarray:
+        embeddings = self.load().encode(texts, batch_size=batch_size or len(texts) or 1)
+        return np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+
+    def stats(self) -> dict:
+        timings = {k: round(v, 3) for k, v in self.timings.items()}
+        return {
+            "model": self.name,
+            "backend": self.backend,
+            "ready": self.is_ready,
+            **timings,
+        }
+
+
+class ONNXEmbeddingModel(EmbeddingModel):
+    """ONNX Runtime backend, needs the `onnx` extra."""
+
+    backend = "onnx"
+
+    def __init__(self, name: str, file_name: str = CONFIG.EMBEDDING.ONNX_FILE):
+        super().__init__(name)
+        self.file_name = file_name
+
+    @property
+    def identity(self) -> str:
+        identity = super().identity
+        # The exports of one repo differ, e.g. fp32 and qint8
+        return f"{identity}:{self.file_name}" if self.file_name else identity
+
+    def _load(self, sentence_transformer: type):
+        for module in ("onnxruntime", "optimum"):
+            if importlib.util.find_spec(module) is None:
+                raise ImportError(
+                    f"The onnx embedding backend needs `{module}`, "
+                    "install the `onnx` extra"
+                )
+        return sentence_transformer(
+            self.name,
+            backend="onnx",
+            model_kwargs={"file_name": self.file_name} if self.file_name else None,
+        )
+
+
+class QuantizedEmbeddingModel(EmbeddingModel):
+    """PyTorch backend with its Linear layers dynamically quantized to int8."""
+
+    backend = "int8"
+
+    def _load(self, sentence_transformer: type):
+        # pylint: disable-next=import-outside-toplevel
+        import torch
+
+        return torch.ao.quantization.quantize_dynamic(
+            sentence_transformer(self.name, device="cpu"),
+            {torch.nn.Linear},
+            dtype=torch.qint8,
+        )
+
+
+EMBEDDING_BACKENDS = {
+    x.backend: x for x in [EmbeddingModel, ONNXEmbeddingModel, QuantizedEmbeddingModel]
+}
+
+
+def create_local_embedding_model(
+    backend: str = CONFIG.EMBEDDING.BACKEND,
+    name: str = CONFIG.EMBEDDING.MODEL_NAME,
+) -> EmbeddingModel:
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unsupported embedding backend `{backend}`")
+    return EMBEDDING_BACKENDS[backend](name)
+
+
+def send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = FRAME_HEADER.unpack(recv_exactly(sock, FRAME_HEADER.size))
+    return recv_exactly(sock, size)
+
+
+class RemoteEmbeddingModel:
+    """
+    Client of a shared `app.commands.embedding_server`, so workers on a node
+    share one loaded model. Keeps one connection per calling thread.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.name = f"unix:{socket_path}"
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.is_ready = False
+        self.timings = {}
+        # Identity of the server's model, known once loaded
+        self.identity = None
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _send(self, payload: bytes) -> bytes:
+        if getattr(self._local, "sock", None) is None:
+            self._local.sock = self._connect()
+        try:
+            send_frame(self._local.sock, payload)
+            return recv_frame(self._local.sock)
+        except OSError:
+            self._local.sock.close()
+            self._local.sock = None
+            raise
+
+    def _request(self, texts: Union[list[str], dict]) -> bytes:
+        payload = json.dumps(texts).encode()
+        try:
+            response = self._send(payload)
+        except OSError:
+            # One retry on a fresh connection, the server may have restarted
+            response = self._send(payload)
+        if response[:1] != b"O":
+            raise RuntimeError(response[1:].decode())
+        return response[1:]
+
+    def load(self):
+        started = time.perf_counter()
+        self.identity = self._request({"op": "identity"}).decode()
+        self.timings["connect_seconds"] = time.perf_counter() - started
+
+    def encode(
+        self,
+        texts: list[str],
+        batch_size: int = None,  # pylint: disable=unused-argument
+    ) -> np.ndarray:
+        data = self._request(texts)
+        return np.frombuffer(data, dtype=EMBEDDING_DTYPE).reshape(len(texts), -1)
+
+    def stats(self) -> dict:
+        timings = {k: round(v, 3) for k, v in self.timings.items()}
+        return {
+            "model": self.name,
+            "backend": "remote",
+            "ready": self.is_ready,
+            **timings,
+        }
+
+
+def create_embedding_model():
+    if CONFIG.EMBEDDING.SERVER_SOCKET:
+        return RemoteEmbeddingModel(
+            CONFIG.EMBEDDING.SERVER_SOCKET,
+            timeout=CONFIG.EMBEDDING.SERVER_TIMEOUT,
+        )
+    return create_local_embedding_model()
+
+
+model = create_embedding_model()
+
+
+def warm_up_model(embedding_model=None):
+    """Loads the model and runs one encode so the first request pays neither."""
+    embedding_model = model if embedding_model is None else embedding_model
+    embedding_model.load()
+    if CONFIG.EMBEDDING.WARM_UP:
+        started = time.perf_counter()
+        embedding_model.encode(["warm up"])
+        embedding_model.timings["warm_up_seconds"] = time.perf_counter() - started
+    embedding_model.is_ready = True
+
+
+async def start_embedding_model(retry_interval: float = 5.0):
+    """Lifespan task, retries until the model (or embedding server) is up."""
+    started = time.perf_counter()
+    while True:
+        try:
+            await run_blocking(warm_up_model)
+            embedding_cache.store = await run_blocking(create_embedding_store)
+            break
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Embedding model startup failed", extra={"error": str(e)})
+            await asyncio.sleep(retry_interval)
+    model.timings["ready_seconds"] = time.perf_counter() - started
+    logger.info("Embedding model ready", extra=model.stats())
+
+
+def create_embedding_store(embedding_model=None) -> Optional[SQLiteEmbeddingStore]:
+    """
+    Persistent tier, namespaced by the identity of the loaded model; for the
+    embedding server that is the server's backend, not this worker's config.
+    """
+    embedding_model = model if embedding_model is None else embedding_model
+    if not CONFIG.EMBEDDING.CACHE_PATH:
+        return None
+    return SQLiteEmbeddingStore(
+        CONFIG.EMBEDDING.CACHE_PATH,
+        namespace=embedding_model.identity,
+    )
+
+
+# The store is attached by `start_embedding_model` once the model is known
+embedding_cache = EmbeddingCache(max_bytes=CONFIG.EMBEDDING.CACHE_MAX_BYTES)
+
+
+def encode_embeddings(texts: list[str], batch_size: int = None) -> list[bytes]:
+    """Encodes cache misses, each normalized prompt once, and caches them."""
+    keys = [fingerprint_prompt(x) for x in texts]
+    unique = dict(zip(keys, texts))
+    encoded = model.encode(list(unique.values()), batch_size=batch_size)
+    encoded = dict(zip(unique, encoded))
+    embedding_cache.set_many(encoded)
+    return [encoded[x].tobytes() for x in keys]
+
+
+def lookup_embeddings(texts: list[str]) -> tuple[list[Optional[bytes]], list[str]]:
+    """Cached embeddings, None where the cache missed, and the missed prompts."""
+    keys = [fingerprint_prompt(x) for x in texts]
+    cached = embedding_cache.get_many(keys)
+    embeddings = [cached[x].tobytes() if x in cached else None for x in keys]
+    return embeddings, [x for x, y in zip(texts, embeddings) if y is None]
+
+
+async def lookup_embeddings_async(
+    texts: list[str],
+) -> tuple[list[Optional[bytes]], list[str]]:
+    """`lookup_embeddings`, with the persistent store read off the event loop."""
+    keys = [fingerprint_prompt(x) for x in texts]
+    cached = embedding_cache.get_many_memory(keys)
+    missing = [x for x in keys if x not in cached]
+    if missing and embedding_cache.store is not None:
+        cached.update(await run_blocking(embedding_cache.get_many_stored, missing))
+    elif missing:
+        # Without a store this only counts the misses
+        embedding_cache.get_many_stored(missing)
+    embeddings = [cached[x].tobytes() if x in cached else None for x in keys]
+    return embeddings, [x for x, y in zip(texts, embeddings) if y is None]
+
+
+def fill_embeddings(
+    embeddings: list[Optional[bytes]],
+    encoded: list[bytes],
+) -> list[bytes]:
+    encoded = iter(encoded)
+    return [x if x is not None else next(encoded) for x in embeddings]
+
+
+def generate_embeddings(
+    texts: list[str],
+    batch_size: int = None,
+    use_cache: bool = True,
+) -> list[bytes]:
+    """Encodes a batch of prompts, in a single forward pass by default."""
+    if not use_cache:
+        return [x.tobytes() for x in model.encode(texts, batch_size=batch_size)]
+    embeddings, missing = lookup_embeddings(texts)
+    if not missing:
+        return embeddings
+    return fill_embeddings(embeddings, encode_embeddings(missing, batch_size))
+
+
+embedding_batcher = MicroBatcher(
+    encode_embeddings,
+    max_batch_size=CONFIG.EMBEDDING.MAX_BATCH_SIZE,
+    max_wait=CONFIG.EMBEDDING.BATCH_WINDOW_MS / 1000,
+)
+
+
+async def generate_embedding_async(text: str) -> bytes:
+    """Prompt text as little-endian float32 bytes, micro-batched off the event loop."""
+    return (await generate_embeddings_async([text]))[0]
+
+
+async def generate_embeddings_async(texts: list[str]) -> list[bytes]:
+    """Cache hits return immediately, only misses wait for a micro-batch."""
+    embeddings, missing = await lookup_embeddings_async(texts)
+    if not missing:
+        return embeddings
+    return fill_embeddings(embeddings, await embedding_batcher.submit_many(missing))
+
+
+def embedding_to_vector(embedding: bytes) -> np.ndarray:
+    """Views stored embedding bytes as a float32 vector without copying."""
+    return np.frombuffer(embedding, dtype=EMBEDDING_DTYPE)
+
+
+def normalize_vectors(vectors: np.ndarray, dimension: int = None) -> np.ndarray:
+    """L2-normalizes a vector or stack of vectors into an (N, dimension) matrix."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors = vectors.reshape(-1, dimension or vectors.shape[-1])
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def calculate_similarities(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine scores of one query against a pre-normalized (N, dimension) matrix."""
+    return matrix @ normalize_vectors(query)[0]
+
+
+def top_k_similarities(
+    query: np.ndarray,
+    matrix: np.ndarray,
+    k: int = 1,
+    threshold: float = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns row positions and scores of the `k` best matches, best first."""
+    scores = calculate_similarities(query, matrix)
+    k = min(k, len(scores))
+    if k == 0:
+        positions = np.empty(0, dtype=np.int64)
+    elif k == 1:
+        positions = np.array([np.argmax(scores)])
+    else:
+        positions = np.argpartition(-scores, k - 1)[:k]
+        positions = positions[np.argsort(-scores[positions])]
+
+    if threshold is not None:
+        positions = positions[scores[positions] >= threshold]
+    return positions, scores[positions]
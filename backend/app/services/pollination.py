@@ -1,10 +1,12 @@
-import httpx
 from urllib.parse import quote
 import os
+from app.utilities.http_client import http_clients
 
 # Your API Key
 POLLINATIONS_API_KEY = os.getenv("POLLINATIONS_API_KEY")
 
+http_clients.register("pollinations", read_timeout=90.0, follow_redirects=True)
+
 
 async def generate_image_content(prompt: str) -> bytes:
     """Generates image via Pollinations AI using an API key."""
@@ -24,18 +26,15 @@ async def generate_image_content(prompt: str) -> bytes:
 
     headers = {"Authorization": f"Bearer {POLLINATIONS_API_KEY}", "Accept": "image/*"}
 
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        response = await client.get(url, params=params, headers=headers, timeout=90.0)
-
-        if response.status_code == 200:
-            if "image" in response.headers.get("Content-Type", ""):
-                return response.content
-            raise Exception(
-                f"Expected image, got {response.headers.get('Content-Type')}"
-            )
-
-        # Log the error detail if available
-        error_detail = response.text
-        raise Exception(
-            f"Pollinations AI Error ({response.status_code}): {error_detail}"
-        )
+    response = await http_clients.request(
+        "pollinations", "GET", url, params=params, headers=headers
+    )
+
+    if response.status_code == 200:
+        if "image" in response.headers.get("Content-Type", ""):
+            return response.content
+        raise Exception(f"Expected image, got {response.headers.get('Content-Type')}")
+
+    # Log the error detail if available
+    error_detail = response.text
+    raise Exception(f"Pollinations AI Error ({response.status_code}): {error_detail}")
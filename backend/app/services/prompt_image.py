@@ -0,0 +1,107 @@
+from typing import Union
+
+from app.models.databases.orm.prompt_image import PromptImage
+from app.models.response_models.prompt_image import PromptImageResponseModel
+from app.queries.prompt_image import is_pgvector_enabled, save_prompt_image_async
+from app.services.cloudinary import upload_image_to_cloud_async
+from app.services.embedding import embedding_to_vector, generate_embedding_async
+from app.services.pollination import generate_image_content
+from app.services.similarity import (
+    cache_exact_prompt_image,
+    find_similar_prompt_image,
+    is_pgvector_search_enabled,
+)
+from app.services.vector_index import prompt_image_index
+from app.utilities.config import CONFIG
+from app.utilities.job_queue import JobQueue
+from app.utilities.logger import logger
+from app.utilities.postgresql import AsyncSessionLocal, AsyncSlaveSessionLocal
+from app.utilities.query_cache import create_cache_backend
+from app.utilities.single_flight import SingleFlight
+
+# Concurrent generate calls for the same normalized prompt share one generation
+generation_flight = SingleFlight()
+
+
+def create_job_store():
+    """Shared store for job status, None keeps jobs in the queuing worker only."""
+    if CONFIG.JOB.BACKEND == "memory":
+        return None
+    return create_cache_backend(
+        CONFIG.JOB.BACKEND,
+        size=CONFIG.JOB.MAX_QUEUE_SIZE,
+        ttl=CONFIG.JOB.RESULT_TTL,
+        prefix="jobs",
+    )
+
+
+# Background generations for `/generate?background=true`
+generation_jobs = JobQueue(
+    max_workers=CONFIG.JOB.MAX_WORKERS,
+    max_queue_size=CONFIG.JOB.MAX_QUEUE_SIZE,
+    result_ttl=CONFIG.JOB.RESULT_TTL,
+    store=create_job_store(),
+    poll_interval=CONFIG.JOB.POLL_INTERVAL,
+)
+
+
+def get_generation_key(prompt_hash: str, user_id: int, is_public: bool) -> str:
+    # Private images are never shared with other users
+    return prompt_hash if is_public else f"{user_id}:{prompt_hash}"
+
+
+async def resolve_prompt_image(
+    user_id: int,
+    prompt_text: str,
+    prompt_hash: str,
+    is_public: bool = True,
+) -> Union[PromptImage, PromptImageResponseModel]:
+    """Returns a similar cached image, generating and saving one if none exists."""
+    new_embedding = await generate_embedding_async(prompt_text)
+    new_vector = embedding_to_vector(new_embedding)
+
+    # Own sessions, since coalesced callers may outlive the first request
+    async with AsyncSlaveSessionLocal() as async_slave_db:
+        match = await find_similar_prompt_image(
+            async_db=async_slave_db,
+            vector=new_vector,
+        )
+        use_pgvector = await is_pgvector_search_enabled(async_slave_db)
+        # Filled even while the index serves searches, so switching back to
+        # pgvector does not silently skip the rows saved in the meantime
+        has_pgvector = await is_pgvector_enabled(async_slave_db)
+    if match is not None:
+        entry, similarity = match
+        logger.debug(
+            "Similarity found", extra={"similarity": similarity, "id": entry.id}
+        )
+        return entry
+
+    logger.debug("No similarity found. Generating new image...")
+    image_bytes = await generate_image_content(prompt_text)
+
+    cloud_url = await upload_image_to_cloud_async(image_bytes)
+
+    new_record = PromptImage(
+        user_id=user_id,
+        prompt_text=prompt_text,
+        prompt_hash=prompt_hash,
+        embedding=new_embedding,
+        image_url=cloud_url,
+        is_public=is_public,
+        key_word=None,
+    )
+
+    async with AsyncSessionLocal() as async_db:
+        new_record = await save_prompt_image_async(
+            async_db=async_db,
+            prompt_image=new_record,
+            embedding_pgvector=new_vector if has_pgvector else None,
+        )
+    if not new_record.is_public:
+        return new_record
+
+    if not use_pgvector:
+        prompt_image_index.add([new_record.id], new_vector)
+    # Shared with coalesced callers, so hand out the detached response model
+    return cache_exact_prompt_image(new_record)
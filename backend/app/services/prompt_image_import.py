@@ -0,0 +1,208 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from app.models.enums.bulk_import import ImportFormat, ImportMethod
+from app.queries.prompt_image import (
+    bulk_insert_prompt_images,
+    copy_prompt_images,
+    get_existing_prompt_hashes,
+    has_pgvector_column,
+)
+from app.services.embedding import embedding_to_vector, generate_embeddings
+from app.utilities.logger import logger
+from app.utilities.postgresql import get_db_context
+from app.utilities.text import fingerprint_prompt
+
+TRUE_VALUES = {"1", "t", "true", "y", "yes"}
+
+
+@dataclass
+class ImportCheckpoint:
+    source: str
+    # Input records covered by committed batches
+    offset: int = 0
+    inserted: int = 0
+    skipped: int = 0
+
+
+def load_checkpoint(path: str, source: str) -> ImportCheckpoint:
+    if not os.path.exists(path):
+        return ImportCheckpoint(source=source)
+    with open(path, encoding="utf-8") as f:
+        checkpoint = ImportCheckpoint(**json.load(f))
+    if checkpoint.source != source:
+        raise ValueError(f"Checkpoint `{path}` belongs to `{checkpoint.source}`")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: ImportCheckpoint):
+    # Replaced atomically, a crash never leaves a partial checkpoint
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(asdict(checkpoint), f)
+    os.replace(temp_path, path)
+
+
+def get_import_format(path: str, file_format: Optional[str] = None) -> ImportFormat:
+    if file_format is not None:
+        return ImportFormat(file_format)
+    extension = os.path.splitext(path)[1].lower()
+    return (
+        ImportFormat.NDJSON if extension in (".ndjson", ".jsonl") else ImportFormat.CSV
+    )
+
+
+def iter_records(path: str, file_format: ImportFormat) -> Iterator[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        if file_format == ImportFormat.CSV:
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_batches(records: Iterable[dict], batch_size: int) -> Iterator[list[dict]]:
+    records = iter(records)
+    while batch := list(islice(records, batch_size)):
+        yield batch
+
+
+def parse_bool(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def prepare_rows(records: list[dict], user_id: int, is_public: bool) -> list[dict]:
+    """Drops records without a prompt or image URL and duplicate prompts."""
+    rows = {}
+    for record in records:
+        prompt_text = str(record.get("prompt_text") or "").strip()
+        image_url = str(record.get("image_url") or "").strip()
+        if not prompt_text or not image_url:
+            continue
+        prompt_hash = fingerprint_prompt(prompt_text)
+        rows.setdefault(
+            prompt_hash,
+            {
+                "user_id": user_id,
+                "prompt_text": prompt_text,
+                "prompt_hash": prompt_hash,
+                "image_url": image_url,
+                "is_public": parse_bool(record.get("is_public"), is_public),
+                "key_word": record.get("key_word") or None,
+            },
+        )
+    return list(rows.values())
+
+
+def import_prompt_images(
+    path: str,
+    user_id: int,
+    file_format: Optional[str] = None,
+    method: str = ImportMethod.INSERT,
+    batch_size: int = 1000,
+    encode_batch_size: int = 256,
+    is_public: bool = True,
+    checkpoint_path: Optional[str] = None,
+) -> dict:
+    """
+    Streams a CSV/NDJSON catalogue into prompt_images, resuming after the last
+    committed batch. The next batch is encoded while the previous one is written.
+    API workers pick the rows up on their next vector index refresh, the pgvector
+    column is filled on insert.
+    """
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+    checkpoint = load_checkpoint(checkpoint_path, os.path.abspath(path))
+    records = islice(
+        iter_records(path, get_import_format(path, file_format)),
+        checkpoint.offset,
+        None,
+    )
+    write_rows = (
+        copy_prompt_images
+        if ImportMethod(method) == ImportMethod.COPY
+        else bulk_insert_prompt_images
+    )
+    # Filled whenever the column exists, whichever backend serves searches
+    with get_db_context() as db:
+        with_pgvector = has_pgvector_column(db)
+
+    stats = {"read": 0, "inserted": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    def write_batch(rows: list[dict], count: int):
+        with get_db_context() as db:
+            if rows:
+                write_rows(db, rows, with_pgvector=with_pgvector)
+            db.commit()
+
+        stats["read"] += count
+        stats["inserted"] += len(rows)
+        stats["skipped"] += count - len(rows)
+        checkpoint.offset += count
+        checkpoint.inserted += len(rows)
+        checkpoint.skipped += count - len(rows)
+        save_checkpoint(checkpoint_path, checkpoint)
+        logger.info(
+            "Prompt image import progress",
+            extra={
+                **asdict(checkpoint),
+                "rows_per_second": round(
+                    stats["read"] / (time.perf_counter() - started), 1
+                ),
+            },
+        )
+
+    # Hashes submitted by this run, the database only knows committed ones
+    seen = set()
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        pending: Optional[Future] = None
+        for batch in iter_batches(records, batch_size):
+            rows = prepare_rows(batch, user_id=user_id, is_public=is_public)
+            with get_db_context() as db:
+                existing = get_existing_prompt_hashes(
+                    db,
+                    prompt_hashes=[x["prompt_hash"] for x in rows],
+                    user_id=user_id,
+                )
+            rows = [
+                x
+                for x in rows
+                if x["prompt_hash"] not in existing and x["prompt_hash"] not in seen
+            ]
+            seen.update(x["prompt_hash"] for x in rows)
+
+            if rows:
+                embeddings = generate_embeddings(
+                    [x["prompt_text"] for x in rows],
+                    batch_size=encode_batch_size,
+                    use_cache=False,
+                )
+                for row, embedding in zip(rows, embeddings):
+                    row["embedding"] = embedding
+                    if with_pgvector:
+                        row["embedding_pgvector"] = embedding_to_vector(embedding)
+
+            if pending is not None:
+                pending.result()
+            pending = writer.submit(write_batch, rows, len(batch))
+        if pending is not None:
+            pending.result()
+
+    elapsed = time.perf_counter() - started
+    return {
+        **stats,
+        "offset": checkpoint.offset,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(stats["read"] / elapsed, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,72 @@
+from typing import Optional
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.databases.orm.prompt_image import PromptImage
+from app.models.response_models.prompt_image import PromptImageResponseModel
+from app.queries.prompt_image import (
+    exact_prompt_cache,
+    get_nearest_prompt_images,
+    get_prompt_image_by_hash,
+    is_pgvector_enabled,
+)
+from app.services.embedding import SIMILARITY_THRESHOLD
+from app.services.vector_index import prompt_image_index
+from app.utilities.config import CONFIG
+
+
+async def is_pgvector_search_enabled(async_db: AsyncSession) -> bool:
+    """pgvector is used when configured and its column exists, else the index."""
+    if CONFIG.VECTOR_INDEX.BACKEND != "pgvector":
+        return False
+    return await is_pgvector_enabled(async_db)
+
+
+async def find_similar_prompt_image(
+    async_db: AsyncSession,
+    vector: np.ndarray,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> Optional[tuple[PromptImage, float]]:
+    """Returns the most similar public prompt image and its cosine similarity."""
+    if await is_pgvector_search_enabled(async_db):
+        rows = await get_nearest_prompt_images(
+            async_db=async_db,
+            embedding=vector,
+            limit=1,
+            is_public=True,
+        )
+        matches = [(x.PromptImage, 1 - x.distance) for x in rows]
+        return next(iter([x for x in matches if x[1] >= threshold]), None)
+
+    match = prompt_image_index.search(vector, threshold=threshold)
+    if match is None:
+        return None
+
+    prompt_image_id, similarity = match
+    prompt_image = await async_db.get(PromptImage, prompt_image_id)
+    return None if prompt_image is None else (prompt_image, similarity)
+
+
+def cache_exact_prompt_image(prompt_image: PromptImage) -> PromptImageResponseModel:
+    response = PromptImageResponseModel.model_validate(prompt_image)
+    exact_prompt_cache.set(prompt_image.prompt_hash, response)
+    return response
+
+
+async def find_exact_prompt_image(
+    async_db: AsyncSession,
+    prompt_hash: str,
+) -> Optional[PromptImageResponseModel]:
+    """Looks up a public prompt image generated from the same normalized prompt."""
+    cached = exact_prompt_cache.get(prompt_hash)
+    if cached is not None:
+        return cached
+
+    prompt_image = await get_prompt_image_by_hash(
+        async_db=async_db,
+        prompt_hash=prompt_hash,
+        is_public=True,
+    )
+    if prompt_image is None:
+        return None
+    return cache_exact_prompt_image(prompt_image)
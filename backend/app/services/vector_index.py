@@ -0,0 +1,306 @@
+import threading
+from typing import Optional
+import numpy as np
+
+from app.queries.prompt_image import get_prompt_image_embeddings
+from app.services.embedding import (
+    embedding_to_vector,
+    normalize_vectors,
+    top_k_similarities,
+)
+from app.utilities.config import CONFIG
+from app.utilities.logger import logger
+from app.utilities.postgresql import get_slave_db_context
+
+
+class VectorIndex:
+    """
+    Inverted-file (IVF) index over L2-normalized float32 vectors.
+
+    Below `train_threshold` vectors the index is a flat inner-product scan.
+    Once trained, vectors are bucketed under k-means centroids and a search
+    only scans the `nprobe` closest buckets. `train` runs from the background
+    refresh, retraining with more buckets whenever the index has grown by
+    `retrain_factor` since the last training.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        nprobe: int = 8,
+        train_threshold: int = 20000,
+        train_iterations: int = 10,
+        retrain_factor: float = 2.0,
+    ):
+        self.dimension = dimension
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.train_iterations = train_iterations
+        self.retrain_factor = retrain_factor
+        self._lock = threading.RLock()
+        # Held while training, so a rebuild never swaps the vectors underneath
+        self._train_lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.synced_id = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, self.dimension), dtype=np.float32)
+        self._count = 0
+        self._trained_count = 0
+        self._centroids = None
+        self._list_ids = []
+        self._list_vectors = []
+        self._list_counts = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def needs_training(self) -> bool:
+        if self.is_trained:
+            return self._count >= self._trained_count * self.retrain_factor
+        return self._count >= self.train_threshold
+
+    @staticmethod
+    def _append(
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        count: int,
+        new_ids: np.ndarray,
+        new_vectors: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Amortized O(1) appends by doubling the backing buffers
+        required = count + len(new_ids)
+        if required > len(ids):
+            capacity = max(required, 2 * len(ids), 64)
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_vectors = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            grown_ids[:count] = ids[:count]
+            grown_vectors[:count] = vectors[:count]
+            ids, vectors = grown_ids, grown_vectors
+        ids[count:required] = new_ids
+        vectors[count:required] = new_vectors
+        return ids, vectors
+
+    @staticmethod
+    def _nearest(
+        vectors: np.ndarray,
+        centroids: np.ndarray,
+        chunk_size: int = 16384,
+    ) -> np.ndarray:
+        # Chunked, a 1M x 1000 score matrix would not fit in memory
+        return np.concatenate(
+            [
+                np.argmax(vectors[i : i + chunk_size] @ centroids.T, axis=1)
+                for i in range(0, len(vectors), chunk_size)
+            ]
+            or [np.empty(0, dtype=np.int64)]
+        )
+
+    def _fit_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        count = len(vectors)
+        nlist = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample_size = min(count, nlist * 64)
+        sample = vectors[rng.choice(count, size=sample_size, replace=False)]
+
+        # Spherical k-means, centroids stay on the unit sphere
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)]
+        for _ in range(self.train_iterations):
+            assignments = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = normalize_vectors(sums, self.dimension)
+        return centroids
+
+    def _assign(
+        self,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        centroids: np.ndarray,
+        lists: tuple[list, list, list],
+    ):
+        list_ids, list_vectors, list_counts = lists
+        assignments = self._nearest(vectors, centroids)
+        for list_no in np.unique(assignments):
+            mask = assignments == list_no
+            list_ids[list_no], list_vectors[list_no] = self._append(
+                list_ids[list_no],
+                list_vectors[list_no],
+                list_counts[list_no],
+                ids[mask],
+                vectors[mask],
+            )
+            list_counts[list_no] += int(mask.sum())
+
+    def _insert(self, ids: np.ndarray, vectors: np.ndarray):
+        if len(ids) == 0:
+            return
+        self._ids, self._vectors = self._append(
+            self._ids, self._vectors, self._count, ids, vectors
+        )
+        self._count += len(ids)
+
+        if self.is_trained:
+            lists = (self._list_ids, self._list_vectors, self._list_counts)
+            self._assign(ids, vectors, self._centroids, lists)
+
+    def train(self):
+        """
+        (Re)trains the IVF buckets on the current vectors. Searches keep using
+        the previous buckets until the new ones are swapped in.
+        """
+        with self._train_lock:
+            with self._lock:
+                count = self._count
+                # Appends never move the first `count` rows of these views
+                ids, vectors = self._ids[:count], self._vectors[:count]
+            if count == 0:
+                return
+
+            centroids = self._fit_centroids(vectors)
+            lists = (
+                [np.empty(0, dtype=np.int64) for _ in centroids],
+                [np.empty((0, self.dimension), dtype=np.float32) for _ in centroids],
+                [0] * len(centroids),
+            )
+            self._assign(ids, vectors, centroids, lists)
+
+            with self._lock:
+                # Rows added while training go into the new buckets as well
+                self._assign(
+                    self._ids[count : self._count],
+                    self._vectors[count : self._count],
+                    centroids,
+                    lists,
+                )
+                self._centroids = centroids
+                self._list_ids, self._list_vectors, self._list_counts = lists
+                self._trained_count = count
+
+        logger.info(
+            "Vector index trained",
+            extra={"size": count, "nlist": len(centroids)},
+        )
+
+    def build(self, ids: list[int], vectors: np.ndarray):
+        """Replaces the index content, training the IVF buckets if large enough."""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        vectors = normalize_vectors(vectors, self.dimension)
+
+        with self._train_lock:
+            with self._lock:
+                self._reset()
+                self._insert(ids, vectors)
+                self.synced_id = int(ids.max()) if len(ids) else 0
+            if self.needs_training:
+                self.train()
+
+    def add(self, ids: list[int], vectors: np.ndarray):
+        """Adds rows saved by this worker ahead of the next `sync`."""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        vectors = normalize_vectors(vectors, self.dimension)
+
+        with self._lock:
+            self._insert(ids, vectors)
+
+    def sync(self, ids: list[int], vectors: np.ndarray):
+        """Adds rows loaded from the database, skipping ones already indexed."""
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        vectors = normalize_vectors(vectors, self.dimension)
+
+        with self._lock:
+            if len(ids):
+                # Re-scanned and locally added rows, only the tail can overlap
+                indexed = self._ids[: self._count]
+                indexed = indexed[indexed >= ids.min()]
+                mask = ~np.isin(ids, indexed)
+                self._insert(ids[mask], vectors[mask])
+                self.synced_id = max(self.synced_id, int(ids.max()))
+
+    def search(
+        self,
+        vector: np.ndarray,
+        threshold: float = -1.0,
+    ) -> Optional[tuple[int, float]]:
+        """Returns `(id, cosine similarity)` of the best match above `threshold`."""
+        query = normalize_vectors(vector, self.dimension)[0]
+
+        with self._lock:
+            if self._count == 0:
+                return None
+
+            if not self.is_trained:
+                candidates = [(self._ids, self._vectors, self._count)]
+            else:
+                probes, _ = top_k_similarities(query, self._centroids, k=self.nprobe)
+                candidates = [
+                    (
+                        self._list_ids[x],
+                        self._list_vectors[x],
+                        self._list_counts[x],
+                    )
+                    for x in probes
+                ]
+
+            best_id, best_score = None, threshold
+            for ids, vectors, count in candidates:
+                if count == 0:
+                    continue
+                positions, scores = top_k_similarities(
+                    query, vectors[:count], threshold=best_score
+                )
+                if len(positions):
+                    best_id, best_score = int(ids[positions[0]]), float(scores[0])
+
+        if best_id is None:
+            return None
+        return best_id, best_score
+
+
+prompt_image_index = VectorIndex(
+    dimension=CONFIG.VECTOR_INDEX.DIMENSION,
+    nprobe=CONFIG.VECTOR_INDEX.NPROBE,
+    train_threshold=CONFIG.VECTOR_INDEX.TRAIN_THRESHOLD,
+    retrain_factor=CONFIG.VECTOR_INDEX.RETRAIN_FACTOR,
+)
+
+
+def refresh_prompt_image_index(full: bool = False):
+    """
+    Loads public prompt image embeddings newer than the indexed ones, then
+    (re)trains the IVF buckets if the index outgrew them.
+    """
+    # Ids are assigned before commit, so a row committed after a higher id was
+    # synced is picked up by re-scanning the trailing `SYNC_OVERLAP` ids
+    min_id = max(prompt_image_index.synced_id - CONFIG.VECTOR_INDEX.SYNC_OVERLAP, 0)
+    with get_slave_db_context() as slave_db:
+        rows = get_prompt_image_embeddings(
+            db=slave_db,
+            is_public=True,
+            min_id=None if full else min_id,
+        )
+        ids = [x.id for x in rows]
+        vectors = embedding_to_vector(b"".join(x.embedding for x in rows)).reshape(
+            -1, prompt_image_index.dimension
+        )
+
+    if full:
+        prompt_image_index.build(ids, vectors)
+    else:
+        prompt_image_index.sync(ids, vectors)
+        if prompt_image_index.needs_training:
+            prompt_image_index.train()
+
+    if ids:
+        logger.debug(
+            "Prompt image index refreshed",
+            extra={"added": len(ids), "size": len(prompt_image_index)},
+        )
@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any, Callable, Optional
+from app.utilities.executor import run_blocking
+
+
+class MicroBatcher:
+    """
+    Collects concurrent calls for up to `max_wait` seconds (or `max_batch_size`
+    items) and resolves them with a single `process_batch` call on the blocking
+    pool, so the event loop never blocks on it.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list], list],
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch: list[tuple[Any, asyncio.Future]] = []
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            # Items queued before a stop or crash are kept for the new worker
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def submit_many(self, items: list) -> list:
+        return list(await asyncio.gather(*[self.submit(x) for x in items]))
+
+    async def _collect(self) -> list[tuple[Any, asyncio.Future]]:
+        # Kept on the instance, so `stop` can fail a batch taken off the queue
+        loop = asyncio.get_running_loop()
+        self._batch = batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Callers that gave up while queued are dropped from the batch
+            batch = [x for x in await self._collect() if not x[1].done()]
+            if not batch:
+                continue
+
+            try:
+                results = await run_blocking(self.process_batch, [x[0] for x in batch])
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def stop(self):
+        """Stops the worker, failing the calls still waiting on it."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        pending = self._batch
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._batch = []
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("batcher stopped"))
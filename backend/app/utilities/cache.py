@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize < 1:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class TTLCache(LRUCache):
+    """LRUCache whose entries expire `ttl` seconds after they are set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(maxsize=maxsize)
+        self.ttl = ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._data.pop(key, None)
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        super().set(key, (value, expires_at))
+
+
+class InMemoryRedis:
+    """
+    Process-local stand-in for the subset of the `redis.Redis` client used by
+    the caches, for running without a Redis server. Keys set with an expiry
+    are LRU-bounded like a server running `volatile-lru`.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._volatile = TTLCache(maxsize=maxsize)
+        self._persistent: dict = {}
+        self._lock = threading.Lock()
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            if name in self._persistent:
+                return self._persistent[name]
+        return self._volatile.get(name)
+
+    def set(self, name: str, value: Any, ex: Optional[float] = None) -> bool:
+        value = value if isinstance(value, bytes) else str(value).encode()
+        with self._lock:
+            self._persistent.pop(name, None)
+            self._volatile.delete(name)
+            if ex is None:
+                self._persistent[name] = value
+            else:
+                self._volatile.set(name, value, ttl=ex)
+        return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._persistent.get(name, b"0")) + amount
+            self._persistent[name] = str(value).encode()
+            return value
+
+    def delete(self, *names: str) -> int:
+        deleted = 0
+        with self._lock:
+            for name in names:
+                deleted += int(
+                    self._persistent.pop(name, None) is not None
+                    or self._volatile.get(name) is not None
+                )
+                self._volatile.delete(name)
+        return deleted
@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+class SQLiteEmbeddingStore:
+    """
+    Persistent tier of the embedding cache, a SQLite file of float32 blobs
+    that survives restarts. Namespaced so models never share vectors. Reads
+    use their own connection, so under WAL they never wait on a commit.
+    """
+
+    def __init__(self, path: str, namespace: str):
+        self.path = path
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._connection.commit()
+        self._read_lock = threading.Lock()
+        self._read_connection = sqlite3.connect(path, check_same_thread=False)
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        placeholders = ", ".join("?" * len(keys))
+        with self._read_lock:
+            rows = self._read_connection.execute(
+                f"SELECT key, vector FROM embeddings "
+                f"WHERE namespace = ? AND key IN ({placeholders})",
+                [self.namespace, *keys],
+            ).fetchall()
+        return {key: np.frombuffer(vector, dtype=np.float32) for key, vector in rows}
+
+    def set_many(self, items: dict[str, np.ndarray]):
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (namespace, key, vector) "
+                "VALUES (?, ?, ?)",
+                [(self.namespace, k, v.tobytes()) for k, v in items.items()],
+            )
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE namespace = ?",
+                [self.namespace],
+            ).fetchone()[0]
+
+    def close(self):
+        with self._read_lock:
+            self._read_connection.close()
+        with self._lock:
+            self._connection.close()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU of float32 embedding vectors bounded by a memory budget in
+    bytes, with an optional persistent store behind it. Misses in memory are
+    looked up in the store and promoted.
+    """
+
+    def __init__(self, max_bytes: int, store: Optional[SQLiteEmbeddingStore] = None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self.bytes = 0
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @staticmethod
+    def _size(key: str, vector: np.ndarray) -> int:
+        return len(key) + vector.nbytes
+
+    def _put(self, key: str, vector: np.ndarray):
+        size = self._size(key, vector)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.bytes -= self._size(key, previous)
+            self._data[key] = vector
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                evicted_key, evicted = self._data.popitem(last=False)
+                self.bytes -= self._size(evicted_key, evicted)
+                self.evictions += 1
+
+    def get_many_memory(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """In-memory hits only, cheap enough to run on the event loop."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._data.get(key)
+                if vector is None:
+                    continue
+                self._data.move_to_end(key)
+                found[key] = vector
+            self.hits += len(found)
+        return found
+
+    def get_many_stored(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Looks up memory misses in the store, which is disk I/O if set."""
+        stored = {}
+        if keys and self.store is not None:
+            stored = self.store.get_many(keys)
+            for key, vector in stored.items():
+                self._put(key, vector)
+
+        with self._lock:
+            self.store_hits += len(stored)
+            self.misses += len(keys) - len(stored)
+        return stored
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found = self.get_many_memory(keys)
+        found.update(self.get_many_stored([x for x in keys if x not in found]))
+        return found
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: dict[str, np.ndarray]):
+        # Copied, a row view would keep the whole encoded batch alive
+        items = {k: np.array(v, dtype=np.float32).reshape(-1) for k, v in items.items()}
+        for key, vector in items.items():
+            vector.flags.writeable = False
+            self._put(key, vector)
+        if items and self.store is not None:
+            self.store.set_many(items)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        stats = {
+            "size": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+        if self.store is not None:
+            stats["store_path"] = self.store.path
+        return stats
@@ -0,0 +1,159 @@
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Union
+
+from sqlalchemy import Engine, create_engine, event, exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.utilities.config import CONFIG, PoolConfig
+
+
+class PoolMetrics:
+    """Checkout latency, timeouts and overflow connections of one pool."""
+
+    def __init__(self, samples: int = 1024):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.overflows = 0
+        self.max_seconds = 0.0
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.max_seconds = max(self.max_seconds, seconds)
+            self._samples.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_overflow(self):
+        with self._lock:
+            self.overflows += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        recent = {}
+        if samples:
+            recent = {
+                "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+                "p99_ms": round(samples[int(len(samples) * 0.99)] * 1000, 3),
+            }
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "overflows": self.overflows,
+            **recent,
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool timing every checkout, including waits for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Disposing an engine swaps in a new pool, the metrics carry over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "in_use": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            **self.metrics.stats(),
+        }
+
+
+class MeteredAsyncAdaptedQueuePool(MeteredQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+# Engines created by the factory, by name, for `/metrics`
+engines: dict[str, Union[Engine, AsyncEngine]] = {}
+
+
+def get_pool_options(pool: PoolConfig) -> dict:
+    return {
+        "pool_size": pool.SIZE,
+        "max_overflow": pool.MAX_OVERFLOW,
+        "pool_timeout": pool.TIMEOUT,
+        "pool_recycle": pool.RECYCLE,
+        "pool_pre_ping": pool.PRE_PING,
+        "pool_use_lifo": True,
+        "echo": CONFIG.DB_POOL.ECHO,
+    }
+
+
+def track_overflows(engine: Engine):
+    @event.listens_for(engine, "connect")
+    def on_connect(*_):
+        # Counted as the connection opens, the pool already includes it
+        if engine.pool.overflow() > 0:
+            engine.pool.metrics.record_overflow()
+
+
+def create_db_engine(name: str, url: Union[str, URL], pool: PoolConfig) -> Engine:
+    engine = create_engine(url, poolclass=MeteredQueuePool, **get_pool_options(pool))
+    track_overflows(engine)
+    engines[name] = engine
+    return engine
+
+
+def get_asyncpg_connect_args() -> dict:
+    if not CONFIG.DB_POOL.PGBOUNCER:
+        return {"server_settings": {"jit": "off"}}
+    # pgbouncer may hand each transaction a different server connection, so
+    # statements are not cached and get unique names; it also rejects
+    # unknown startup parameters such as `jit`
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+
+def create_async_db_engine(
+    name: str,
+    url: Union[str, URL],
+    pool: PoolConfig,
+) -> AsyncEngine:
+    connect_args = {}
+    if make_url(url).drivername == "postgresql+asyncpg":
+        connect_args = get_asyncpg_connect_args()
+    engine = create_async_engine(
+        url,
+        poolclass=MeteredAsyncAdaptedQueuePool,
+        connect_args=connect_args,
+        **get_pool_options(pool),
+    )
+    track_overflows(engine.sync_engine)
+    engines[name] = engine
+    return engine
+
+
+def get_pool_stats() -> dict:
+    return {name: engine.pool.stats() for name, engine in engines.items()}
@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from app.utilities.config import CONFIG
+
+# Shared, bounded pool for sync work that cannot run on the event loop
+blocking_executor = ThreadPoolExecutor(
+    max_workers=CONFIG.EXECUTOR.MAX_WORKERS,
+    thread_name_prefix="blocking",
+)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Runs `func` on the bounded pool, keeping the caller's context variables."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        blocking_executor,
+        partial(context.run, func, *args, **kwargs),
+    )
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool with admission control: besides the `max_workers`
+    running calls at most `max_queue` wait, further calls fail fast with
+    `ExecutorSaturated` instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Moving average of call durations, for the Retry-After estimate
+        self.average_seconds = 0.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=name,
+        )
+        self._lock = threading.Lock()
+
+    def _timed(self, func: Callable, *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            if self.average_seconds:
+                self.average_seconds += (elapsed - self.average_seconds) * 0.1
+            else:
+                self.average_seconds = elapsed
+
+    def get_retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        return max(1, math.ceil(self.pending / self.max_workers * self.average_seconds))
+
+    def _release(self, future: Future):
+        # Runs once the call is done on its thread, or cancelled while queued
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def run(self, func: Callable, *args) -> Any:
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(
+                    "Too many pending requests", self.get_retry_after()
+                )
+            self.pending += 1
+        context = contextvars.copy_context()
+        # A cancelled caller leaves a started call running, it stays pending
+        future = self._executor.submit(context.run, self._timed, func, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "average_ms": round(self.average_seconds * 1000, 1),
+        }
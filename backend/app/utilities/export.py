@@ -1,26 +1,236 @@
+import csv
 import io
+import json
+from typing import AsyncIterator, Optional, Union
 from fastapi.responses import StreamingResponse
-from pandas import DataFrame
+from sqlalchemy import (
+    Boolean,
+    CompoundSelect,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    Numeric,
+    Select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.databases.queries.base import LazyLoadResult
+from app.models.enums.export import ExportFormat
+from app.models.exceptions import LogicException
+from app.utilities.config import CONFIG
 from app.utilities.logger import logger
+from app.utilities.postgresql import AsyncSlaveSessionLocal
 
+# Columnar formats need the optional `pyarrow` package, the `export` extra
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
-def prepare_streaming_response(lazyload_result: LazyLoadResult) -> StreamingResponse:
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file whose written bytes are drained after every batch."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._position += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def iter_partitions(
+    async_db: AsyncSession,
+    select_query: Union[Select, CompoundSelect],
+    chunk_size: int = CONFIG.OTHER.DATA_EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[list]:
+    # Server-side cursor, so only one chunk of rows is held at a time
+    result = await async_db.stream(select_query.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions():
+        yield rows
+
+
+async def iter_csv_chunks(
+    async_db: AsyncSession,
+    select_query: Union[Select, CompoundSelect],
+    columns: list[str],
+    chunk_size: int = CONFIG.OTHER.DATA_EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yields the CSV header, then one encoded chunk per `chunk_size` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+
+    async for rows in iter_partitions(async_db, select_query, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+def to_json_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+async def iter_ndjson_chunks(
+    async_db: AsyncSession,
+    select_query: Union[Select, CompoundSelect],
+    columns: list[str],
+    chunk_size: int = CONFIG.OTHER.DATA_EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yields one JSON object per line, one encoded chunk per `chunk_size` rows."""
+    encoder = json.JSONEncoder(default=to_json_value, ensure_ascii=False)
+    async for rows in iter_partitions(async_db, select_query, chunk_size):
+        yield "".join(
+            encoder.encode(dict(zip(columns, x))) + "\n" for x in rows
+        ).encode()
+
+
+def get_arrow_schema(select_query: Union[Select, CompoundSelect]) -> "pyarrow.Schema":
+    fields = []
+    for column in select_query.selected_columns:
+        if isinstance(column.type, Boolean):
+            arrow_type = pyarrow.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pyarrow.int64()
+        elif isinstance(column.type, (Float, Numeric)):
+            arrow_type = pyarrow.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pyarrow.timestamp(
+                "us", tz="UTC" if column.type.timezone else None
+            )
+        elif isinstance(column.type, LargeBinary):
+            arrow_type = pyarrow.binary()
+        else:
+            arrow_type = pyarrow.string()
+        fields.append(pyarrow.field(column.name, arrow_type))
+    return pyarrow.schema(fields)
+
+
+async def iter_record_batches(
+    async_db: AsyncSession,
+    select_query: Union[Select, CompoundSelect],
+    schema: "pyarrow.Schema",
+    chunk_size: int,
+) -> AsyncIterator["pyarrow.RecordBatch"]:
+    async for rows in iter_partitions(async_db, select_query, chunk_size):
+        # Column-wise conversion straight from the row tuples
+        arrays = [
+            pyarrow.array(values, type=field.type)
+            for values, field in zip(zip(*rows), schema)
+        ]
+        yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+async def iter_arrow_chunks(
+    async_db: AsyncSession,
+    select_query: Union[Select, CompoundSelect],
+    columns: list[str],  # pylint: disable=unused-argument
+    chunk_size: int = CONFIG.OTHER.DATA_EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yields an Arrow IPC stream, one record batch per `chunk_size` rows."""
+    schema = get_arrow_schema(select_query)
+    sink = ChunkSink()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        async for batch in iter_record_batches(
+            async_db, select_query, schema, chunk_size
+        ):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+async def iter_parquet_chunks(
+    async_db: AsyncSession,
+    select_query: Union[Select, CompoundSelect],
+    columns: list[str],  # pylint: disable=unused-argument
+    chunk_size: int = CONFIG.OTHER.DATA_EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yields a Parquet file, one row group per `chunk_size` rows."""
+    schema = get_arrow_schema(select_query)
+    sink = ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        async for batch in iter_record_batches(
+            async_db, select_query, schema, chunk_size
+        ):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+EXPORT_WRITERS = {
+    ExportFormat.CSV: (iter_csv_chunks, "text/csv", "csv"),
+    ExportFormat.NDJSON: (iter_ndjson_chunks, "application/x-ndjson", "ndjson"),
+    ExportFormat.PARQUET: (
+        iter_parquet_chunks,
+        "application/vnd.apache.parquet",
+        "parquet",
+    ),
+    ExportFormat.ARROW: (
+        iter_arrow_chunks,
+        "application/vnd.apache.arrow.stream",
+        "arrows",
+    ),
+}
+
+
+def prepare_streaming_response(
+    lazyload_result: LazyLoadResult,
+    export_format: Optional[ExportFormat] = None,
+) -> StreamingResponse:
+    export_format = ExportFormat(export_format or ExportFormat.CSV)
     logger.debug(
         "Prepare Streaming Response",
         extra={
-            "lazyload_result": lazyload_result,
+            "columns": lazyload_result.columns,
+            "count": lazyload_result.count,
+            "format": export_format.value,
         },
     )
-    dataframe = DataFrame(
-        columns=lazyload_result.columns,
-        data=[x.dict(exclude_unset=True).values() for x in lazyload_result.data],
-    )
-    string_io = io.StringIO()
-    dataframe.to_csv(string_io, index=False)
+    if pyarrow is None and export_format in (
+        ExportFormat.PARQUET,
+        ExportFormat.ARROW,
+    ):
+        raise LogicException(
+            "EXPORT_FORMAT_UNAVAILABLE",
+            extra={"format": export_format.value},
+        )
+    iter_chunks, media_type, extension = EXPORT_WRITERS[export_format]
+
+    async def stream():
+        # Own session, the request scoped one is closed before streaming ends
+        async with AsyncSlaveSessionLocal() as async_slave_db:
+            async for chunk in iter_chunks(
+                async_db=async_slave_db,
+                select_query=lazyload_result.select_query,
+                columns=lazyload_result.columns,
+            ):
+                if chunk:
+                    yield chunk
+
     response = StreamingResponse(
-        iter([string_io.getvalue()]),
-        media_type="text/csv",
+        stream(),
+        media_type=media_type,
     )
-    response.headers["Content-Disposition"] = "attachment; filename=export.csv"
+    response.headers["Content-Disposition"] = f"attachment; filename=export.{extension}"
     return response
@@ -0,0 +1,104 @@
+import asyncio
+import importlib.util
+from typing import Optional
+import httpx
+
+from app.utilities.config import CONFIG
+from app.utilities.logger import logger
+
+
+class HTTPClientManager:
+    """
+    Application-lifetime registry of pooled `httpx.AsyncClient`s for outbound
+    integrations, started and stopped from the FastAPI lifespan.
+    """
+
+    def __init__(self):
+        self._options: dict[str, dict] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._host_limits: dict[str, int] = {}
+        self._host_semaphores: dict[tuple[str, str], asyncio.Semaphore] = {}
+
+    def register(
+        self,
+        name: str,
+        connect_timeout: float = CONFIG.HTTP_CLIENT.CONNECT_TIMEOUT,
+        read_timeout: float = CONFIG.HTTP_CLIENT.READ_TIMEOUT,
+        max_connections: int = CONFIG.HTTP_CLIENT.MAX_CONNECTIONS,
+        max_keepalive_connections: int = CONFIG.HTTP_CLIENT.MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = CONFIG.HTTP_CLIENT.KEEPALIVE_EXPIRY,
+        max_concurrency_per_host: int = CONFIG.HTTP_CLIENT.MAX_CONCURRENCY_PER_HOST,
+        http2: bool = CONFIG.HTTP_CLIENT.HTTP2,
+        **client_options,
+    ):
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "HTTP/2 needs the `http2` extra, falling back to HTTP/1.1",
+                extra={"client": name},
+            )
+            http2 = False
+        self._options[name] = {
+            "timeout": httpx.Timeout(
+                read_timeout,
+                connect=connect_timeout,
+                pool=connect_timeout,
+            ),
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            "http2": http2,
+            **client_options,
+        }
+        self._host_limits[name] = max_concurrency_per_host
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            # Created on first use when running outside the app lifespan
+            client = httpx.AsyncClient(**self._options[name])
+            self._clients[name] = client
+        return client
+
+    async def start(self):
+        for name in self._options:
+            self.get(name)
+
+    async def stop(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._host_semaphores.clear()
+        await asyncio.gather(*[x.aclose() for x in clients])
+
+    def _get_host_semaphore(self, name: str, url: str) -> Optional[asyncio.Semaphore]:
+        limit = self._host_limits[name]
+        if limit < 1:
+            return None
+        key = (name, httpx.URL(url).host)
+        if key not in self._host_semaphores:
+            self._host_semaphores[key] = asyncio.Semaphore(limit)
+        return self._host_semaphores[key]
+
+    async def request(
+        self, name: str, method: str, url: str, **kwargs
+    ) -> httpx.Response:
+        """Sends a request through the named client, capped per destination host."""
+        client = self.get(name)
+        semaphore = self._get_host_semaphore(name, url)
+        if semaphore is None:
+            return await client.request(method, url, **kwargs)
+        async with semaphore:
+            return await client.request(method, url, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "open": not client.is_closed,
+                "http2": self._options[name]["http2"],
+            }
+            for name, client in self._clients.items()
+        }
+
+
+http_clients = HTTPClientManager()
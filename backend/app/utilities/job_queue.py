@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import Any, Awaitable, Callable, Optional
+
+from app.models.enums.job import JobStatus
+from app.utilities.executor import run_blocking
+from app.utilities.logger import logger
+
+
+@dataclass
+class Job:
+    id: str
+    owner_id: Optional[int] = None
+    status: JobStatus = JobStatus.QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def set_status(self, status: JobStatus):
+        self.status = status
+        # Wake current waiters, later ones wait on a fresh event
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            x.name: getattr(self, x.name) for x in fields(self) if x.name != "changed"
+        }
+
+    def update(self, other: "Job"):
+        self.result = other.result
+        self.error = other.error
+        self.finished_at = other.finished_at
+        self.set_status(other.status)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Bounded queue of coroutine jobs drained by `max_workers` tasks. Finished
+    jobs stay readable for `result_ttl` seconds.
+
+    Jobs run in the worker process that queued them. With a `store` (a query
+    cache backend) their status is also written there on every change, so
+    other workers can read and poll them.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue_size: int = 100,
+        result_ttl: float = 600,
+        store=None,
+        poll_interval: float = 1.0,
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.result_ttl = result_ttl
+        self.store = store
+        self.poll_interval = poll_interval
+        self.rejected = 0
+        self._jobs: dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+
+    def _ensure_workers(self):
+        if self._workers and not all(x.done() for x in self._workers):
+            return
+        # Jobs queued before a stop are kept and run by the new workers
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        # Started from a request, so they get an empty context instead of its
+        self._workers = [
+            asyncio.create_task(self._run(), context=contextvars.Context())
+            for _ in range(self.max_workers)
+        ]
+
+    def _prune(self):
+        expires_before = time.time() - self.result_ttl
+        expired = [
+            x.id
+            for x in self._jobs.values()
+            if x.is_finished and x.finished_at < expires_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _call(self, func, *args):
+        # Network stores are blocking clients, keep them off the event loop
+        if self.store.shared:
+            return await run_blocking(func, *args)
+        return func(*args)
+
+    async def _publish(self, job: Job):
+        if self.store is None:
+            return
+        # Only other workers read the store, a failed write must not stop this one
+        try:
+            await self._call(self.store.set, job.id, job.to_dict(), self.result_ttl)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error(
+                "Job status not stored", extra={"job_id": job.id, "error": str(e)}
+            )
+
+    async def _load(self, job_id: str) -> Optional[Job]:
+        data = await self._call(self.store.get, job_id)
+        return Job(**data) if data is not None else None
+
+    async def submit(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        owner_id: Optional[int] = None,
+    ) -> Job:
+        """
+        Queues `func`, raising `JobQueueFull` when the queue is at capacity.
+        It runs in a copy of the caller's context, keeping its correlation id
+        and session user.
+        """
+        self._ensure_workers()
+        self._prune()
+        job = Job(id=uuid.uuid4().hex, owner_id=owner_id)
+        try:
+            self._queue.put_nowait((job, func, contextvars.copy_context()))
+        except asyncio.QueueFull as e:
+            self.rejected += 1
+            raise JobQueueFull("Job queue is full") from e
+        self._jobs[job.id] = job
+        await self._publish(job)
+        return job
+
+    async def record(self, result: Any, owner_id: Optional[int] = None) -> Job:
+        """Stores an already available result as a finished job."""
+        self._prune()
+        job = Job(id=uuid.uuid4().hex, owner_id=owner_id, result=result)
+        job.finished_at = time.time()
+        job.set_status(JobStatus.SUCCEEDED)
+        self._jobs[job.id] = job
+        await self._publish(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = await self._load(job_id)
+        return job
+
+    async def wait(self, job: Job, timeout: Optional[float] = None) -> bool:
+        """Waits for the next status change, returning False on timeout."""
+        if job.is_finished:
+            return True
+        if self.store is not None and self._jobs.get(job.id) is not job:
+            return await self._poll(job, timeout)
+        try:
+            await asyncio.wait_for(job.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _poll(self, job: Job, timeout: Optional[float] = None) -> bool:
+        # Run by another worker, so only its stored status can change
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.poll_interval
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return False
+            await asyncio.sleep(delay)
+            latest = await self._load(job.id)
+            if latest is not None and latest.status != job.status:
+                job.update(latest)
+                return True
+
+    async def _execute(self, job: Job, func: Callable[[], Awaitable[Any]]):
+        try:
+            job.result = await func()
+            status = JobStatus.SUCCEEDED
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Job failed", extra={"job_id": job.id, "error": str(e)})
+            job.error = str(e)
+            status = JobStatus.FAILED
+        job.finished_at = time.time()
+        job.set_status(status)
+        await self._publish(job)
+
+    async def _run(self):
+        while True:
+            job, func, context = await self._queue.get()
+            job.set_status(JobStatus.RUNNING)
+            try:
+                await self._publish(job)
+                await asyncio.create_task(self._execute(job, func), context=context)
+            except asyncio.CancelledError:
+                # Stopped mid-job, pollers get a final status instead of RUNNING
+                job.error = "Job cancelled"
+                job.finished_at = time.time()
+                job.set_status(JobStatus.FAILED)
+                await self._publish(job)
+                raise
+            finally:
+                self._queue.task_done()
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        statuses = [x.status for x in self._jobs.values()]
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "workers": self.max_workers,
+            "running": statuses.count(JobStatus.RUNNING),
+            "tracked": len(statuses),
+            "rejected": self.rejected,
+        }
@@ -1,19 +1,50 @@
+import atexit
 import logging
+import queue
+import random
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable
 from sqlalchemy import log as sqlalchemy_log
 from pythonjsonlogger import jsonlogger
+from app.utilities.config import CONFIG
 from app.utilities.contextvar import contextvar_correlation_id, contextvar_endpoint
 
+CONTEXT_VARIABLES = {
+    "correlation_id": contextvar_correlation_id,
+    "endpoint": contextvar_endpoint,
+}
+
+
+class Lazy:
+    """
+    `extra` value computed only when the record is emitted, so filtered out
+    debug payloads cost nothing: `extra={"payload": Lazy(payload.model_dump)}`.
+    """
+
+    __slots__ = ("func",)
+
+    def __init__(self, func: Callable[[], Any]):
+        self.func = func
+
+    def __call__(self) -> Any:
+        return self.func()
+
 
 class LogFormatter(jsonlogger.JsonFormatter):
     def add_fields(self, log_record, record, message_dict):
         super().add_fields(log_record, record, message_dict)
 
+        for k, v in log_record.items():
+            if isinstance(v, Lazy):
+                log_record[k] = v()
+
         if not log_record.get("timestamp"):
-            log_record["timestamp"] = datetime.utcnow().strftime(
-                "%Y-%m-%dT%H:%M:%S.%fZ"
-            )
+            # When the record was created, it may be formatted later on the listener
+            log_record["timestamp"] = datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
 
         if log_record.get("level"):
             log_record["level"] = log_record["level"].upper()
@@ -25,21 +56,101 @@ class LogFormatter(jsonlogger.JsonFormatter):
             for x in ["pathname", "lineno"]:
                 del log_record[x]
 
-        context_variables = {
-            "correlation_id": contextvar_correlation_id,
-            "endpoint": contextvar_endpoint,
-        }
-        for k, v in context_variables.items():
-            value = v.get()
+        for k, v in CONTEXT_VARIABLES.items():
+            value = getattr(record, k, None) or v.get()
             if value:
                 log_record[k] = value
 
 
+def parse_mapping(value: str) -> dict[str, str]:
+    """Parses "a=1,b=2" settings."""
+    pairs = [x.split("=", 1) for x in value.split(",") if "=" in x]
+    return {k.strip(): v.strip() for k, v in pairs}
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a share of the records at or below `max_level` per logger, the rate
+    of the closest configured ancestor applies; other records always pass.
+    """
+
+    def __init__(self, rates: dict[str, float], max_level: int = logging.DEBUG):
+        super().__init__()
+        self.rates = rates
+        self.max_level = max_level
+        self.dropped = 0
+        self._resolved: dict[str, float] = {}
+
+    def get_rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate, parts = 1.0, name.split(".")
+            for i in range(len(parts), 0, -1):
+                if ".".join(parts[:i]) in self.rates:
+                    rate = self.rates[".".join(parts[:i])]
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or not self.rates:
+            return True
+        if random.random() < self.get_rate(record.name):
+            return True
+        self.dropped += 1
+        return False
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Enqueues records unformatted, the listener thread formats and writes them.
+    Context variables are captured here, on the logging thread; a full queue
+    drops the record instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        for k, v in CONTEXT_VARIABLES.items():
+            value = v.get()
+            if value:
+                setattr(record, k, value)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def get_logging_stats() -> dict:
+    stats = {"sampled_out": sampling_filter.dropped}
+    if isinstance(logHandler, LogQueueHandler):
+        stats["queued"] = logHandler.queue.qsize()
+        stats["dropped"] = logHandler.dropped
+    return stats
+
+
 logger = logging.getLogger()
-logHandler = logging.StreamHandler(sys.stdout)
 formatter = LogFormatter("%(level) %(timestamp) %(message) %(pathname)s %(lineno)d")
-logHandler.setFormatter(formatter)
-logger.setLevel(logging.DEBUG)
+streamHandler = logging.StreamHandler(sys.stdout)
+streamHandler.setFormatter(formatter)
+sampling_filter = SamplingFilter(
+    {k: float(v) for k, v in parse_mapping(CONFIG.LOGGING.SAMPLE_RATES).items()}
+)
+if CONFIG.LOGGING.ASYNC:
+    logHandler = LogQueueHandler(queue.Queue(maxsize=CONFIG.LOGGING.QUEUE_SIZE))
+    log_listener = QueueListener(logHandler.queue, streamHandler)
+    log_listener.start()
+    # Flushes the queued records on exit
+    atexit.register(log_listener.stop)
+else:
+    logHandler = streamHandler
+logHandler.addFilter(sampling_filter)
+logger.setLevel(CONFIG.LOGGING.LEVEL)
 logger.addHandler(logHandler)
 logging.getLogger("pika").propagate = False
 logging.getLogger("boto3").setLevel(logging.ERROR)
@@ -47,5 +158,7 @@ logging.getLogger("botocore").setLevel(logging.ERROR)
 logging.getLogger("s3transfer").setLevel(logging.ERROR)
 logging.getLogger("urllib3").setLevel(logging.ERROR)
 logging.getLogger("multipart").setLevel(logging.ERROR)
+for name, level in parse_mapping(CONFIG.LOGGING.LEVELS).items():
+    logging.getLogger(name).setLevel(level.upper())
 # pylint: disable-next=protected-access
 sqlalchemy_log._add_default_handler = lambda x: None
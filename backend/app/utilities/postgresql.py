@@ -1,15 +1,22 @@
+import asyncio
 from typing import AsyncGenerator, Generator
 from asyncio import current_task
 from contextlib import contextmanager
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_scoped_session,
-    create_async_engine,
 )
 from app.utilities.config import CONFIG
-
+from app.utilities.engine import create_async_db_engine, create_db_engine
+from app.utilities.executor import run_blocking
+from app.utilities.replica import (
+    AsyncReplicaSession,
+    Replica,
+    ReplicaRouter,
+    ReplicaSession,
+    to_async_url,
+)
 
 # Synchronous - Read + Write
 db_user = CONFIG.DB.USERNAME
@@ -17,13 +24,10 @@ db_pwd = CONFIG.DB.PASSWORD
 db_host = CONFIG.DB.HOST
 db_default_db = CONFIG.DB.DATABASE
 db_port = CONFIG.DB.PORT
-engine = create_engine(
+engine = create_db_engine(
+    "master",
     f"postgresql://{db_user}:{db_pwd}@{db_host}:{db_port}/{db_default_db}",
-    pool_recycle=300,
-    pool_size=150,
-    pool_use_lifo=True,
-    pool_pre_ping=True,
-    echo=True,
+    CONFIG.DB_POOL.MASTER,
 )
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -32,14 +36,10 @@ SessionLocal = sessionmaker(
 )
 
 # Asynchronous - Read + Write
-async_engine = create_async_engine(
+async_engine = create_async_db_engine(
+    "async_master",
     f"postgresql+asyncpg://{db_user}:{db_pwd}@{db_host}:{db_port}/{db_default_db}",
-    pool_recycle=120,
-    pool_size=150,
-    pool_use_lifo=True,
-    pool_pre_ping=True,
-    echo=True,
-    connect_args={"server_settings": {"jit": "off"}},
+    CONFIG.DB_POOL.ASYNC_MASTER,
 )
 AsyncSessionLocal = sessionmaker(
     autocommit=False,
@@ -75,43 +75,58 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
         yield db
 
 
-# Synchronous - Read Only
-slave_db_user = CONFIG.SLAVE_DB.USERNAME
-slave_db_pwd = CONFIG.SLAVE_DB.PASSWORD
-slave_db_host = CONFIG.SLAVE_DB.HOST
-slave_db_default_db = CONFIG.SLAVE_DB.DATABASE
-slave_db_port = CONFIG.SLAVE_DB.PORT
-slave_engine = create_engine(
-    # pylint: disable-next=line-too-long
-    f"postgresql://{slave_db_user}:{slave_db_pwd}@{slave_db_host}:{slave_db_port}/{slave_db_default_db}",
-    pool_recycle=120,
-    pool_size=150,
-    pool_use_lifo=True,
-    pool_pre_ping=True,
-    echo=True,
+# Read Only - replicas behind a router, the primary without any
+def get_replica_urls() -> list[str]:
+    if CONFIG.SLAVE_DB.URLS:
+        return [x.strip() for x in CONFIG.SLAVE_DB.URLS.split(",") if x.strip()]
+    if not CONFIG.SLAVE_DB.HOST:
+        return []
+    slave_db_user = CONFIG.SLAVE_DB.USERNAME
+    slave_db_pwd = CONFIG.SLAVE_DB.PASSWORD
+    slave_db_host = CONFIG.SLAVE_DB.HOST
+    slave_db_default_db = CONFIG.SLAVE_DB.DATABASE
+    slave_db_port = CONFIG.SLAVE_DB.PORT
+    return [
+        f"postgresql://{slave_db_user}:{slave_db_pwd}"
+        f"@{slave_db_host}:{slave_db_port}/{slave_db_default_db}"
+    ]
+
+
+def create_replica(index: int, url: str) -> Replica:
+    return Replica(
+        engine=create_db_engine(f"replica_{index}", url, CONFIG.DB_POOL.SLAVE),
+        async_engine=create_async_db_engine(
+            f"async_replica_{index}",
+            to_async_url(url),
+            CONFIG.DB_POOL.ASYNC_SLAVE,
+        ),
+    )
+
+
+replica_router = ReplicaRouter(
+    primary=engine,
+    async_primary=async_engine,
+    replicas=[create_replica(i, x) for i, x in enumerate(get_replica_urls())],
+    strategy=CONFIG.SLAVE_DB.STRATEGY,
+    max_lag=CONFIG.SLAVE_DB.MAX_LAG,
+    sticky_seconds=CONFIG.SLAVE_DB.STICKY_SECONDS,
 )
+
+# Synchronous - Read Only
 SlaveSessionLocal = sessionmaker(
+    class_=ReplicaSession,
     autocommit=False,
     autoflush=False,
-    bind=slave_engine,
+    router=replica_router,
 )
 
-
-# Asynchronous - Read + Write
-async_slave_engine = create_async_engine(
-    f"postgresql+asyncpg://{db_user}:{db_pwd}@{db_host}:{db_port}/{db_default_db}",
-    pool_recycle=120,
-    pool_size=150,
-    pool_use_lifo=True,
-    pool_pre_ping=True,
-    echo=True,
-    connect_args={"server_settings": {"jit": "off"}},
-)
+# Asynchronous - Read Only
 AsyncSlaveSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=AsyncReplicaSession,
     autocommit=False,
     autoflush=False,
-    bind=async_slave_engine,
-    class_=AsyncSession,
+    router=replica_router,
 )
 
 
@@ -125,7 +140,7 @@ def get_slave_db() -> Generator[Session, None, None]:
 
 @contextmanager
 def get_slave_db_context() -> Generator[Session, None, None]:
-    db = SessionLocal()
+    db = SlaveSessionLocal()
     try:
         yield db
     finally:
@@ -143,3 +158,10 @@ async def get_async_slave_db() -> AsyncGenerator[AsyncSession, None]:
     finally:
         if db.is_active:
             await db.close()
+
+
+async def check_replicas_periodically():
+    """Lifespan task refreshing replica health and lag."""
+    while True:
+        await run_blocking(replica_router.check)
+        await asyncio.sleep(CONFIG.SLAVE_DB.HEALTH_CHECK_INTERVAL)
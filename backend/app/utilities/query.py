@@ -1,4 +1,7 @@
-from typing import Union
+import base64
+import binascii
+import json
+from typing import Any, Optional, Union
 
 # pylint: disable-next=no-name-in-module
 from sqlalchemy.sql.annotation import AnnotatedColumn
@@ -55,3 +58,24 @@ def has_aggregation_function(field: Union[AnnotatedColumn, Label]):
         return has_aggregation_function(field.left)
 
     return False
+
+
+def encode_cursor(order_by: Optional[str], values: list[Any]) -> str:
+    """Encodes the keyset of the last row of a page as an opaque cursor."""
+    data = json.dumps(
+        {"o": order_by, "v": values},
+        default=lambda x: x.isoformat() if hasattr(x, "isoformat") else str(x),
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str, order_by: Optional[str]) -> Optional[list[Any]]:
+    """Returns the cursor keyset, or None if it is malformed or for another sort."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("o") != order_by:
+        return None
+    return data.get("v")
@@ -0,0 +1,218 @@
+import hashlib
+import pickle
+from typing import Any, Iterable, Optional, Union
+from sqlalchemy import CompoundSelect, Select
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql.util import find_tables
+
+from app.utilities.cache import InMemoryRedis, LRUCache, TTLCache
+from app.utilities.config import CONFIG
+from app.utilities.executor import run_blocking
+
+
+class MemoryCacheBackend:
+    """Per-process backend holding result objects as they are."""
+
+    shared = False
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._entries.set(key, value, ttl=ttl)
+
+    def delete(self, key: str):
+        self._entries.delete(key)
+
+    def get_versions(self, tables: list[str]) -> list[int]:
+        return [self._versions.get(x, 0) for x in tables]
+
+    def incr_version(self, table: str):
+        self._versions[table] = self._versions.get(table, 0) + 1
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+
+class RedisCacheBackend:
+    """
+    Backend shared across workers through a `redis.Redis` compatible client.
+    Entries carry a TTL and version keys do not, so a `volatile-lru` server
+    bounds the entries without evicting versions.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = "query-cache"):
+        self.client = client
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(f"{self.prefix}:entry:{key}")
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(
+            f"{self.prefix}:entry:{key}",
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            ex=max(1, int(ttl)),
+        )
+
+    def delete(self, key: str):
+        self.client.delete(f"{self.prefix}:entry:{key}")
+
+    def get_versions(self, tables: list[str]) -> list[int]:
+        return [int(self.client.get(f"{self.prefix}:version:{x}") or 0) for x in tables]
+
+    def incr_version(self, table: str):
+        self.client.incr(f"{self.prefix}:version:{table}")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class QueryCache:
+    """
+    Caches query results under a hash of the compiled statements and the
+    versions of the tables they read; writers bump the table versions.
+    """
+
+    def __init__(self, backend=None, ttl: float = 30.0, compiled_size: int = 256):
+        self.backend = backend
+        self.ttl = ttl
+        self._compiled = LRUCache(maxsize=compiled_size)
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def _call(self, func, *args):
+        # Network backends are blocking clients, keep them off the event loop
+        if self.backend.shared:
+            return await run_blocking(func, *args)
+        return func(*args)
+
+    @staticmethod
+    def get_tables(*statements: Union[Select, CompoundSelect]) -> list[str]:
+        return sorted(
+            {x.name for statement in statements for x in find_tables(statement)}
+        )
+
+    def get_statement_sql(
+        self,
+        dialect: Dialect,
+        statement: Union[Select, CompoundSelect],
+    ) -> tuple[str, list[Any]]:
+        """Returns the SQL and bound values, compiling once per statement shape."""
+        # pylint: disable-next=protected-access
+        cache_key = statement._generate_cache_key()
+        if cache_key is None:
+            compiled = statement.compile(dialect=dialect)
+            return str(compiled), sorted(compiled.construct_params().items())
+
+        key = (dialect.name, cache_key.key)
+        sql = self._compiled.get(key)
+        if sql is None:
+            sql = str(statement.compile(dialect=dialect))
+            self._compiled.set(key, sql)
+        return sql, [x.effective_value for x in cache_key.bindparams]
+
+    def get_statement_hash(
+        self,
+        dialect: Dialect,
+        statements: Iterable[Union[Select, CompoundSelect]],
+        extra: Iterable[Any] = (),
+    ) -> str:
+        digest = hashlib.sha256()
+        for statement in statements:
+            sql, params = self.get_statement_sql(dialect, statement)
+            digest.update(sql.encode())
+            digest.update(repr(params).encode())
+        for value in extra:
+            digest.update(repr(value).encode())
+        return digest.hexdigest()
+
+    async def get_key(
+        self,
+        dialect: Dialect,
+        statements: list[Union[Select, CompoundSelect]],
+        extra: Iterable[Any] = (),
+    ) -> str:
+        tables = self.get_tables(*statements)
+        versions = await self._call(self.backend.get_versions, tables)
+        versions = ",".join(f"{t}@{v}" for t, v in zip(tables, versions))
+        return f"{versions}:{self.get_statement_hash(dialect, statements, extra)}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await self._call(self.backend.get, key)
+
+    async def set(self, key: str, value: Any):
+        await self._call(self.backend.set, key, value, self.ttl)
+
+    async def invalidate(self, *tables: str):
+        if not self.enabled:
+            return
+        for table in tables:
+            await self._call(self.backend.incr_version, table)
+
+    def invalidate_sync(self, *tables: str):
+        if not self.enabled:
+            return
+        for table in tables:
+            self.backend.incr_version(table)
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            **self.backend.stats(),
+            "compiled": self._compiled.stats(),
+        }
+
+
+def create_cache_backend(name: str, size: int, ttl: float, prefix: str):
+    """Backend by config name, None for "none"."""
+    if name == "memory":
+        return MemoryCacheBackend(maxsize=size, ttl=ttl)
+    if name == "redis":
+        # Optional dependency, only needed for the shared backend
+        import redis  # pylint: disable=import-outside-toplevel
+
+        return RedisCacheBackend(
+            redis.Redis(
+                host=CONFIG.REDIS.HOST,
+                port=int(CONFIG.REDIS.PORT or 6379),
+                password=CONFIG.REDIS.PASSWORD,
+            ),
+            prefix=prefix,
+        )
+    if name == "inmemory-redis":
+        return RedisCacheBackend(InMemoryRedis(maxsize=size), prefix=prefix)
+    return None
+
+
+def create_query_cache() -> QueryCache:
+    return QueryCache(
+        backend=create_cache_backend(
+            CONFIG.QUERY_CACHE.BACKEND,
+            size=CONFIG.QUERY_CACHE.SIZE,
+            ttl=CONFIG.QUERY_CACHE.TTL,
+            prefix="query-cache",
+        ),
+        ttl=CONFIG.QUERY_CACHE.TTL,
+        compiled_size=CONFIG.QUERY_CACHE.PLAN_SIZE,
+    )
+
+
+query_cache = create_query_cache()
@@ -0,0 +1,194 @@
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Engine, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.utilities.cache import TTLCache
+from app.utilities.contextvar import contextvar_session_user_id
+from app.utilities.logger import logger
+
+# Seconds the replica is behind, 0 while it has replayed everything it received
+LAG_QUERIES = {
+    "postgresql": text(
+        "SELECT CASE "
+        "WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE("
+        "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0"
+        ") END"
+    ),
+}
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_checked_out(engine: Engine) -> int:
+    # SQLite stand-ins may use pools that do not count connections
+    pool = engine.pool
+    return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+def to_async_url(url: str) -> URL:
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+@dataclass
+class Replica:
+    engine: Engine
+    async_engine: Optional[AsyncEngine] = None
+    healthy: bool = True
+    lag: float = 0.0
+    failures: int = 0
+    selected: int = 0
+    checked_at: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+    def get_engine(self, is_async: bool) -> Engine:
+        return self.async_engine.sync_engine if is_async else self.engine
+
+    def check(self):
+        """Refreshes health and replication lag, marking it unhealthy on errors."""
+        self.checked_at = time.time()
+        query = LAG_QUERIES.get(self.engine.dialect.name, text("SELECT 0"))
+        try:
+            with self.engine.connect() as connection:
+                self.lag = float(connection.execute(query).scalar() or 0)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.healthy = False
+            self.failures += 1
+            logger.warning(
+                "Replica health check failed",
+                extra={"replica": self.name, "error": str(e)},
+            )
+            return
+        self.healthy = True
+
+    def stats(self) -> dict:
+        return {
+            "replica": self.name,
+            "healthy": self.healthy,
+            "lag": round(self.lag, 3),
+            "failures": self.failures,
+            "selected": self.selected,
+            "checked_out": get_checked_out(self.engine),
+        }
+
+
+class ReplicaRouter:
+    """
+    Picks the engine of read-only sessions: a healthy replica no more than
+    `max_lag` seconds behind, round-robin or by fewest checked out
+    connections, else the primary. Users who just wrote read from the primary
+    for `sticky_seconds`, so they see their own writes.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        async_primary: Optional[AsyncEngine] = None,
+        replicas: list[Replica] = None,
+        strategy: str = "round-robin",
+        max_lag: float = 5.0,
+        sticky_seconds: float = 10.0,
+        sticky_size: int = 10000,
+    ):
+        if strategy not in ("round-robin", "least-connections"):
+            raise ValueError(f"Unsupported replica strategy `{strategy}`")
+        self.primary = primary
+        self.async_primary = async_primary
+        self.replicas = replicas or []
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.fallbacks = 0
+        self.sticky_reads = 0
+        self._counter = itertools.count()
+        self._writers = TTLCache(maxsize=sticky_size, ttl=sticky_seconds)
+
+    def record_write(self, user_id: Optional[int]):
+        if user_id:
+            self._writers.set(user_id, True)
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        return bool(user_id) and self._writers.get(user_id) is not None
+
+    def get_replica(self, is_async: bool = False) -> Optional[Replica]:
+        candidates = [x for x in self.replicas if x.healthy and x.lag <= self.max_lag]
+        if not candidates:
+            return None
+        # Rotated on every call, so least-connections ties spread out too
+        start = next(self._counter) % len(candidates)
+        candidates = candidates[start:] + candidates[:start]
+        if self.strategy == "least-connections":
+            return min(
+                candidates,
+                key=lambda x: get_checked_out(x.get_engine(is_async)),
+            )
+        return candidates[0]
+
+    def get_bind(self, is_async: bool = False) -> Engine:
+        primary = self.async_primary.sync_engine if is_async else self.primary
+        if not self.replicas:
+            return primary
+        if self.is_sticky(contextvar_session_user_id.get()):
+            self.sticky_reads += 1
+            return primary
+        replica = self.get_replica(is_async)
+        if replica is None:
+            self.fallbacks += 1
+            return primary
+        replica.selected += 1
+        return replica.get_engine(is_async)
+
+    def check(self):
+        for replica in self.replicas:
+            replica.check()
+
+    def stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "max_lag": self.max_lag,
+            "fallbacks": self.fallbacks,
+            "sticky_reads": self.sticky_reads,
+            "replicas": [x.stats() for x in self.replicas],
+        }
+
+
+class ReplicaSession(Session):
+    """Read-only session bound, on its first query, to the engine the router picks."""
+
+    is_async = False
+
+    def __init__(self, *args, router: ReplicaRouter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.router = router
+        self._replica_bind = None
+
+    # pylint: disable-next=arguments-differ
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        # One engine per session, so the count and page queries read the same replica
+        if self._replica_bind is None:
+            self._replica_bind = self.router.get_bind(is_async=self.is_async)
+        return self._replica_bind
+
+    def close(self):
+        super().close()
+        self._replica_bind = None
+
+
+class AsyncReplicaSession(ReplicaSession):
+    """`sync_session_class` of replica `AsyncSession`s."""
+
+    is_async = True
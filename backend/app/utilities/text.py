@@ -0,0 +1,11 @@
+import hashlib
+
+
+def normalize_prompt(text: str) -> str:
+    """Casefolds and collapses whitespace so trivially different prompts match."""
+    return " ".join(text.casefold().split())
+
+
+def fingerprint_prompt(text: str) -> str:
+    """SHA-256 hex digest of the normalized prompt."""
+    return hashlib.sha256(normalize_prompt(text).encode("utf-8")).hexdigest()
@@ -0,0 +1,86 @@
+import time
+from typing import Any, Optional
+
+from app.utilities.cache import TTLCache
+from app.utilities.config import CONFIG
+from app.utilities.executor import run_blocking
+from app.utilities.query_cache import create_cache_backend
+
+
+class UserCache:
+    """
+    Short-lived cache for request authentication: verified access tokens are
+    kept per process, user snapshots in a per-process or shared backend.
+    Writers call `invalidate` so changed users are reloaded on the next request.
+    """
+
+    def __init__(self, backend=None, ttl: float = 30.0, token_size: int = 10000):
+        self.backend = backend
+        self.ttl = ttl
+        self._tokens = TTLCache(maxsize=token_size, ttl=ttl)
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get_token(self, token: str) -> Optional[int]:
+        if not self.enabled:
+            return None
+        return self._tokens.get(token)
+
+    def set_token(self, token: str, user_id: int, expires_at: float):
+        """Kept no longer than the token itself is valid."""
+        if self.enabled:
+            ttl = min(self.ttl, expires_at - time.time())
+            if ttl > 0:
+                self._tokens.set(token, user_id, ttl=ttl)
+
+    def get_user(self, user_id: int) -> Optional[dict[str, Any]]:
+        if not self.enabled:
+            return None
+        return self.backend.get(f"user:{user_id}")
+
+    def set_user(self, user_id: int, snapshot: dict[str, Any]):
+        if self.enabled:
+            self.backend.set(f"user:{user_id}", snapshot, self.ttl)
+
+    async def get_user_async(self, user_id: int) -> Optional[dict[str, Any]]:
+        # Network backends are blocking clients, keep them off the event loop
+        if self.enabled and self.backend.shared:
+            return await run_blocking(self.get_user, user_id)
+        return self.get_user(user_id)
+
+    async def set_user_async(self, user_id: int, snapshot: dict[str, Any]):
+        if self.enabled and self.backend.shared:
+            await run_blocking(self.set_user, user_id, snapshot)
+        else:
+            self.set_user(user_id, snapshot)
+
+    def invalidate(self, user_id: int):
+        if self.enabled:
+            self.backend.delete(f"user:{user_id}")
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "tokens": self._tokens.stats(),
+            "users": self.backend.stats(),
+        }
+
+
+def create_user_cache() -> UserCache:
+    return UserCache(
+        backend=create_cache_backend(
+            CONFIG.USER_CACHE.BACKEND,
+            size=CONFIG.USER_CACHE.SIZE,
+            ttl=CONFIG.USER_CACHE.TTL,
+            prefix="user-cache",
+        ),
+        ttl=CONFIG.USER_CACHE.TTL,
+        token_size=CONFIG.USER_CACHE.SIZE,
+    )
+
+
+user_cache = create_user_cache()
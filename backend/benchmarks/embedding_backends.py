@@ -0,0 +1,152 @@
+"""
+Embedding backends: throughput vs accuracy on a fixed prompt set.
+
+Encodes the same prompts with every backend, then checks each backend's
+cache-hit decisions (cosine >= SIMILARITY_THRESHOLD) for every prompt pair
+against the reference backend, both backend-to-backend and with stored
+embeddings from the reference (existing rows stay as they were encoded):
+
+    uv run python -m benchmarks.embedding_backends
+    uv run python -m benchmarks.embedding_backends --backends sentence-transformers int8
+
+Backends whose optional dependencies are missing are skipped.
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services.embedding import (
+    EMBEDDING_BACKENDS,
+    SIMILARITY_THRESHOLD,
+    create_local_embedding_model,
+    normalize_vectors,
+)
+from app.utilities.config import CONFIG
+
+# Paraphrases of one request sit next to each other, so the set has pairs on
+# both sides of the threshold
+PROMPTS = [
+    "a watercolor fox in the snow",
+    "watercolor painting of a fox in snow",
+    "a red fox sitting in a snowy forest, watercolor",
+    "a cyberpunk city street at night with neon signs",
+    "neon lit cyberpunk street at night",
+    "futuristic city at night, neon lights, rain",
+    "portrait of an old man with a beard, oil painting",
+    "oil painting portrait of a bearded old man",
+    "an old fisherman portrait, oil on canvas",
+    "a cute corgi wearing sunglasses on the beach",
+    "corgi dog with sunglasses at the beach",
+    "a puppy playing in the sand by the sea",
+    "a medieval castle on a hill at sunset",
+    "castle on a hilltop during sunset, medieval",
+    "fantasy fortress on a mountain at dusk",
+    "an astronaut riding a horse on mars",
+    "astronaut on horseback on the surface of mars",
+    "a spaceman riding a horse in space",
+    "a bowl of ramen with a soft boiled egg, food photography",
+    "food photo of ramen noodles with egg",
+    "japanese noodle soup in a ceramic bowl",
+    "a minimalist logo of a mountain, flat design",
+    "flat minimalist mountain logo",
+    "simple vector icon of a mountain peak",
+    "a steampunk airship flying over clouds",
+    "steampunk zeppelin above the clouds",
+    "victorian flying machine in the sky",
+    "a cozy reading nook with plants and warm light",
+    "cozy corner with a book, plants and lamp light",
+    "a living room interior with houseplants",
+    "an underwater coral reef with colorful fish",
+    "colorful tropical fish swimming around coral",
+    "scuba diver exploring a shipwreck",
+    "a samurai standing in the rain, ink drawing",
+    "ink illustration of a samurai in rain",
+    "a ninja on a rooftop at night",
+    "a dragon made of fire over a volcano",
+    "fire dragon flying above an erupting volcano",
+    "a sleeping dragon curled around gold coins",
+    "a field of sunflowers under a blue sky",
+    "sunflower field with clear blue sky",
+    "a lavender field in provence",
+]
+
+
+def measure(backend: str, name: str, batch_size: int) -> dict:
+    embedding_model = create_local_embedding_model(backend, name)
+    embedding_model.load()
+    embedding_model.encode(PROMPTS[:1])
+
+    latencies = []
+    for prompt in PROMPTS:
+        started = time.perf_counter()
+        embedding_model.encode([prompt])
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    embeddings = embedding_model.encode(PROMPTS, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - started
+    return {
+        "embeddings": normalize_vectors(embeddings),
+        "latency_ms": statistics.median(latencies) * 1000,
+        "prompts_per_second": len(PROMPTS) / batch_seconds,
+        "load_seconds": embedding_model.timings["load_seconds"],
+    }
+
+
+def compare_decisions(scores: np.ndarray, reference: np.ndarray) -> tuple[int, int]:
+    """Pairs whose hit/miss decision differs from the reference, and pair count."""
+    pairs = np.triu_indices(len(reference), k=1)
+    hits = scores[pairs] >= SIMILARITY_THRESHOLD
+    reference_hits = reference[pairs] >= SIMILARITY_THRESHOLD
+    return int(np.count_nonzero(hits != reference_hits)), len(hits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=list(EMBEDDING_BACKENDS),
+        default=list(EMBEDDING_BACKENDS),
+        help="the first one is the reference",
+    )
+    parser.add_argument("--model", default=CONFIG.EMBEDDING.MODEL_NAME)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    results = {}
+    for backend in args.backends:
+        try:
+            results[backend] = measure(backend, args.model, args.batch_size)
+        except ImportError as e:
+            print(f"{backend}: skipped ({e})")
+    if not results:
+        return
+
+    reference_backend = next(iter(results))
+    reference = results[reference_backend]["embeddings"]
+    reference_scores = reference @ reference.T
+    print(
+        f"{len(PROMPTS)} prompts, threshold {SIMILARITY_THRESHOLD}, "
+        f"reference {reference_backend}"
+    )
+    for backend, result in results.items():
+        embeddings = result["embeddings"]
+        drift = np.sum(embeddings * reference, axis=1)
+        flipped, pairs = compare_decisions(embeddings @ embeddings.T, reference_scores)
+        mixed_flipped, _ = compare_decisions(embeddings @ reference.T, reference_scores)
+        print(
+            f"{backend:>21}: load {result['load_seconds']:.2f}s, "
+            f"single {result['latency_ms']:.1f}ms, "
+            f"batch {result['prompts_per_second']:.0f} prompts/s | "
+            f"cosine to reference min {drift.min():.4f} mean {drift.mean():.4f} | "
+            f"flipped decisions {flipped}/{pairs}, "
+            f"vs stored reference {mixed_flipped}/{pairs}"
+        )
+
+
+if __name__ == "__main__":
+    main()
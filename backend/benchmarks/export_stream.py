@@ -0,0 +1,151 @@
+"""
+Peak memory and time-to-first-byte of the CSV export, comparing the previous
+DataFrame export against the streaming one.
+
+Seeds a temporary SQLite database (needs `aiosqlite`) unless `--dsn` points
+at an already populated database:
+
+    uv run python -m benchmarks.export_stream --rows 1000000 \
+        --formats csv ndjson parquet arrow
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pandas import DataFrame
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models.databases.orm.prompt_image import PromptImage
+from app.models.enums.export import ExportFormat
+from app.utilities.export import EXPORT_WRITERS
+
+SELECT_QUERY = select(
+    PromptImage.id,
+    PromptImage.prompt_text,
+    PromptImage.image_url,
+    PromptImage.is_public,
+    PromptImage.user_id,
+    PromptImage.created_date,
+    PromptImage.modified_date,
+).select_from(PromptImage)
+COLUMNS = [x.name for x in SELECT_QUERY.selected_columns]
+
+
+def seed(path: str, rows: int):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE prompt_images (id INTEGER PRIMARY KEY, user_id INTEGER, "
+        "prompt_text TEXT, prompt_hash TEXT, embedding BLOB, image_url TEXT, "
+        "is_public BOOLEAN, key_word TEXT, created_date DATETIME, "
+        "modified_date DATETIME)"
+    )
+    connection.executemany(
+        "INSERT INTO prompt_images (id, user_id, prompt_text, embedding, image_url, "
+        "is_public, created_date, modified_date) VALUES (?, ?, ?, x'', ?, 1, "
+        "'2026-01-01 00:00:00.000000', '2026-01-01 00:00:00.000000')",
+        (
+            (
+                x,
+                x % 100,
+                f"a watercolor painting of prompt number {x}",
+                f"https://res.cloudinary.com/demo/image/upload/prompts/{x}.png",
+            )
+            for x in range(1, rows + 1)
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+async def dataframe_export(async_db: AsyncSession):
+    # Previous implementation: load every row, then build one CSV string
+    result = await async_db.execute(SELECT_QUERY)
+    dataframe = DataFrame(columns=COLUMNS, data=[tuple(x) for x in result.all()])
+    string_io = io.StringIO()
+    dataframe.to_csv(string_io, index=False)
+    yield string_io.getvalue().encode()
+
+
+def streaming_export(export_format: ExportFormat):
+    iter_chunks = EXPORT_WRITERS[export_format][0]
+
+    async def export(async_db: AsyncSession):
+        async for chunk in iter_chunks(async_db, SELECT_QUERY, COLUMNS):
+            yield chunk
+
+    return export
+
+
+async def enumerate_async(iterator):
+    position = 0
+    async for item in iterator:
+        yield position, item
+        position += 1
+
+
+async def measure(engine, export, header_chunks: int, trace: bool) -> dict:
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    first_byte, size = None, 0
+    async with AsyncSession(engine) as async_db:
+        async for position, chunk in enumerate_async(export(async_db)):
+            # A CSV header or Arrow schema alone does not count as data
+            if first_byte is None and position >= header_chunks:
+                first_byte = time.perf_counter() - started
+            size += len(chunk)
+    result = {"ttfb": first_byte, "total": time.perf_counter() - started}
+    if trace:
+        result["peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    result["size"] = size
+    return result
+
+
+async def main(args: argparse.Namespace):
+    dsn = args.dsn
+    if dsn is None:
+        path = os.path.join(tempfile.mkdtemp(), "export.db")
+        started = time.perf_counter()
+        seed(path, args.rows)
+        print(f"seeded {args.rows} rows in {time.perf_counter() - started:.1f}s")
+        dsn = f"sqlite+aiosqlite:///{path}"
+
+    engine = create_async_engine(dsn)
+    runs = [("dataframe csv", dataframe_export, 0)] + [
+        (
+            f"streaming {x.value}",
+            streaming_export(x),
+            int(x in (ExportFormat.CSV, ExportFormat.ARROW)),
+        )
+        for x in args.formats
+    ]
+    for name, export, header_chunks in runs:
+        timing = await measure(engine, export, header_chunks, trace=False)
+        memory = await measure(engine, export, header_chunks, trace=True)
+        print(
+            f"{name:<18} ttfb {timing['ttfb'] * 1000:>9.1f}ms "
+            f"total {timing['total']:>6.1f}s "
+            f"peak {memory['peak'] / 2**20:>8.1f}MiB "
+            f"size {timing['size'] / 2**20:>7.1f}MiB"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--dsn", default=None)
+    parser.add_argument(
+        "--formats",
+        type=ExportFormat,
+        nargs="+",
+        default=[ExportFormat.CSV],
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Outbound connection reuse: pooled `http_clients` vs a new client per request.
+
+Runs a local keep-alive stub server that counts accepted TCP connections:
+
+    uv run python -m benchmarks.http_client_reuse --requests 500 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import time
+import httpx
+
+from app.utilities.http_client import HTTPClientManager
+
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: image/png\r\n"
+    b"Content-Length: 2\r\n"
+    b"Connection: keep-alive\r\n\r\nok"
+)
+
+
+class StubServer:
+    def __init__(self):
+        self.connections = 0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/image"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def run(send, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            response = await send()
+            assert response.status_code == 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*[call() for _ in range(requests)])
+    return time.perf_counter() - started
+
+
+async def main(args: argparse.Namespace):
+    server = StubServer()
+    url = await server.start()
+
+    async def per_request():
+        async with httpx.AsyncClient() as client:
+            return await client.get(url)
+
+    elapsed = await run(per_request, args.requests, args.concurrency)
+    print(
+        f"client per request: {server.connections:>5} connections "
+        f"{args.requests / elapsed:>8.0f} req/s"
+    )
+
+    server.connections = 0
+    manager = HTTPClientManager()
+    manager.register("stub", max_concurrency_per_host=args.concurrency)
+    await manager.start()
+    elapsed = await run(
+        lambda: manager.request("stub", "GET", url), args.requests, args.concurrency
+    )
+    await manager.stop()
+    print(
+        f"pooled manager:     {server.connections:>5} connections "
+        f"{args.requests / elapsed:>8.0f} req/s"
+    )
+    assert server.connections <= args.concurrency
+
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
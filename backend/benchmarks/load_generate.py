@@ -0,0 +1,78 @@
+"""
+Latency of cheap endpoints while image generations are in flight.
+
+Start the app, then run:
+
+    uv run python -m benchmarks.load_generate --token <access token> \
+        --base-url http://localhost:8888 --generations 20 --probes 500
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+import httpx
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def generate(client: httpx.AsyncClient, headers: dict):
+    # Unique prompts so every call misses the caches and really generates
+    await client.post(
+        "/prompt-image/generate",
+        params={"prompt_text": f"load test {uuid.uuid4()}"},
+        headers=headers,
+        timeout=120,
+    )
+
+
+async def probe(
+    client: httpx.AsyncClient,
+    headers: dict,
+    count: int,
+) -> dict[str, list[float]]:
+    latencies = {"/health": [], "/prompt-images": []}
+    for _ in range(count):
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies["/health"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await client.post(
+            "/prompt-images",
+            json={"pagination": {"limit": 10, "page": 1}},
+            headers=headers,
+        )
+        latencies["/prompt-images"].append(time.perf_counter() - started)
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8888")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--probes", type=int, default=500)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    async with httpx.AsyncClient(base_url=args.base_url) as client:
+        generations = [
+            asyncio.create_task(generate(client, headers))
+            for _ in range(args.generations)
+        ]
+        latencies = await probe(client, headers, args.probes)
+        await asyncio.gather(*generations, return_exceptions=True)
+
+    for endpoint, values in latencies.items():
+        print(
+            f"{endpoint:>15}: p50 {percentile(values, 0.5) * 1000:7.1f}ms"
+            f" | p99 {percentile(values, 0.99) * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
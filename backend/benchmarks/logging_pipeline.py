@@ -0,0 +1,71 @@
+"""
+Logging cost on the calling thread: JSON formatting + write inline vs the
+queue handler, and a filtered debug payload built eagerly vs with `Lazy`:
+
+    uv run python -m benchmarks.logging_pipeline --records 20000
+
+Records are written to os.devnull, so only the formatting and handoff count.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueListener
+
+from app.utilities.logger import Lazy, LogFormatter, LogQueueHandler
+
+PAYLOAD = {
+    "filters": [{"field": "prompt_text", "operator": "contains", "value": "cat"}],
+    "pagination": {"limit": 20, "page": 3},
+    "sort": {"order_by": "created_date", "sort_order": "desc"},
+}
+
+
+def build_payload() -> dict:
+    return {k: list(v) if isinstance(v, list) else dict(v) for k, v in PAYLOAD.items()}
+
+
+def measure(bench_logger: logging.Logger, records: int, lazy: bool = False) -> float:
+    started = time.perf_counter()
+    for _ in range(records):
+        bench_logger.info(
+            "Lazyload Prompt Images Payload Received",
+            extra={"payload": Lazy(build_payload) if lazy else build_payload()},
+        )
+    return (time.perf_counter() - started) / records * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    bench_logger = logging.getLogger("benchmarks.logging_pipeline")
+    bench_logger.propagate = False
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        stream_handler = logging.StreamHandler(devnull)
+        stream_handler.setFormatter(
+            LogFormatter("%(level) %(timestamp) %(message) %(pathname)s %(lineno)d")
+        )
+
+        bench_logger.addHandler(stream_handler)
+        print(f"        inline: {measure(bench_logger, args.records):.1f} us/record")
+        bench_logger.removeHandler(stream_handler)
+
+        queue_handler = LogQueueHandler(queue.Queue(maxsize=args.records))
+        listener = QueueListener(queue_handler.queue, stream_handler)
+        listener.start()
+        bench_logger.addHandler(queue_handler)
+        print(f"         queue: {measure(bench_logger, args.records):.1f} us/record")
+        listener.stop()
+
+        bench_logger.setLevel(logging.WARNING)
+        for name, lazy in (("eager filtered", False), ("lazy filtered", True)):
+            elapsed = measure(bench_logger, args.records, lazy)
+            print(f"{name:>14}: {elapsed:.2f} us/record")
+
+
+if __name__ == "__main__":
+    main()
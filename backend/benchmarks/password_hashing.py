@@ -0,0 +1,91 @@
+"""
+Login bursts: bcrypt on the event loop vs the bounded password pool.
+
+Fires `--logins` concurrent password verifications while a probe task keeps
+sleeping `--probe-ms` on the same loop; its lateness is the latency every
+other request on the worker pays during the burst:
+
+    uv run python -m benchmarks.password_hashing --logins 64 --workers 4 --queue 32
+
+Pool logins beyond workers + queue are rejected (503 + Retry-After in the API).
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.authentication import hash_password, verify_password
+from app.utilities.executor import BoundedExecutor, ExecutorSaturated
+
+
+async def probe(interval: float, stop: asyncio.Event) -> list[float]:
+    lateness = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lateness.append(time.perf_counter() - started - interval)
+    return lateness
+
+
+async def run(
+    logins: int,
+    hashed: str,
+    executor: BoundedExecutor = None,
+    probe_interval: float = 0.01,
+) -> dict:
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(probe_interval, stop))
+    await asyncio.sleep(probe_interval)
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        if executor is None:
+            return verify_password("correct horse", hashed)
+        try:
+            return await executor.run(verify_password, "correct horse", hashed)
+        except ExecutorSaturated:
+            rejected += 1
+            return None
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lateness = sorted(await probe_task)
+    return {
+        "elapsed": elapsed,
+        "completed": logins - rejected,
+        "rejected": rejected,
+        "p50": statistics.median(lateness),
+        "p99": lateness[int(len(lateness) * 0.99)],
+        "max": lateness[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=32)
+    parser.add_argument("--probe-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    hashed = hash_password("correct horse")
+    modes = (
+        ("event loop", None),
+        ("pool", BoundedExecutor(args.workers, args.queue, name="password")),
+    )
+    for name, executor in modes:
+        result = asyncio.run(run(args.logins, hashed, executor, args.probe_ms / 1000))
+        print(
+            f"{name:>10}: {result['completed'] / result['elapsed']:.1f} logins/s, "
+            f"{result['rejected']} rejected | collateral latency "
+            f"p50 {result['p50'] * 1000:.1f}ms p99 {result['p99'] * 1000:.1f}ms "
+            f"max {result['max'] * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Lazyload statement building: per-request rebuild vs the request shape plan cache.
+
+Builds and executes the prompt image lazyload statement against an in-memory
+SQLite table, with the plan and compiled statement caches off, then on. Both
+runs keep SQLAlchemy's own compiled cache, as production does:
+
+    uv run python -m benchmarks.query_plan --requests 5000
+"""
+
+import argparse
+import random
+import time
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.models.databases.orm.prompt_image import PromptImage
+from app.models.databases.queries.base import FilterModel, PaginateModel, SortModel
+from app.queries.base import generate_count_query, handle_pre_lazyloading, query_plans
+from app.utilities.query_cache import QueryCache
+
+SELECT_QUERY = select(
+    PromptImage.id,
+    PromptImage.prompt_text,
+    PromptImage.image_url,
+    PromptImage.is_public,
+    PromptImage.user_id,
+    PromptImage.created_date,
+    PromptImage.modified_date,
+).select_from(PromptImage)
+
+
+def get_requests(count: int) -> list[dict]:
+    """Same few shapes with different values, as a list page sends them."""
+    shapes = []
+    for _ in range(count):
+        shapes.append(
+            {
+                "filters": [
+                    FilterModel(
+                        field="prompt_text",
+                        operator="contains",
+                        value=random.choice(["cat", "dog", "sky", "sea"]),
+                    ),
+                    FilterModel(
+                        field="user_id",
+                        operator="in",
+                        value=random.sample(range(1, 50), 3),
+                    ),
+                ],
+                "sort": SortModel(
+                    order_by=random.choice(["created_date", "id"]),
+                    sort_order="desc",
+                ),
+                "pagination": PaginateModel(limit=20, page=random.randint(1, 50)),
+                "excluded_fields": ["image_url"],
+            }
+        )
+    return shapes
+
+
+def run(engine, requests: list[dict], cached: bool) -> float:
+    query_plans.maxsize = 256 if cached else 0
+    query_plans.clear()
+    query_plans.hits = query_plans.misses = 0
+    query_cache = QueryCache(compiled_size=256 if cached else 0)
+    with Session(engine) as db:
+        started = time.perf_counter()
+        for request in requests:
+            select_query = handle_pre_lazyloading(select_query=SELECT_QUERY, **request)
+            count_query = generate_count_query(select_query)
+            query_cache.get_statement_hash(
+                engine.dialect,
+                [select_query, count_query],
+            )
+            db.execute(select_query).all()
+            db.execute(count_query).scalar()
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    PromptImage.__table__.create(engine)
+    requests = get_requests(args.requests)
+
+    for name, cached in (("rebuild", False), ("plan cache", True)):
+        # Warms SQLAlchemy's compiled cache, so neither run pays for it
+        run(engine, requests[:100], cached)
+        elapsed = run(engine, requests, cached)
+        print(
+            f"{name:>10}: {elapsed:.2f}s "
+            f"({elapsed / args.requests * 1e6:.0f} us/request)"
+        )
+    print(f"plans: {query_plans.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Per-request cost of the batched cosine similarity kernel.
+
+    uv run python -m benchmarks.similarity_kernel --rows 10000 100000 1000000
+"""
+
+import argparse
+import time
+import numpy as np
+
+from app.services.embedding import (
+    embedding_to_vector,
+    normalize_vectors,
+    top_k_similarities,
+)
+
+DIMENSION = 384
+THRESHOLD = 0.8
+
+
+def calculate_similarity(embedding_a: bytes, embedding_b: bytes) -> float:
+    # Previous implementation: one stored embedding at a time
+    vec_a = embedding_to_vector(embedding_a)
+    vec_b = embedding_to_vector(embedding_b)
+    return float(np.dot(vec_a, vec_b) / (np.linalg.norm(vec_a) * np.linalg.norm(vec_b)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--pairwise-sample", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    query = rng.standard_normal(DIMENSION, dtype=np.float32)
+
+    # Per-row cost of the pairwise function, extrapolated to each size
+    rows = rng.standard_normal((args.pairwise_sample, DIMENSION), dtype=np.float32)
+    query_bytes = query.tobytes()
+    stored = [x.tobytes() for x in rows]
+    started = time.perf_counter()
+    for embedding in stored:
+        calculate_similarity(query_bytes, embedding)
+    pairwise_per_row = (time.perf_counter() - started) / args.pairwise_sample
+
+    for count in args.rows:
+        matrix = normalize_vectors(
+            rng.standard_normal((count, DIMENSION), dtype=np.float32)
+        )
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            top_k_similarities(query, matrix, k=5, threshold=THRESHOLD)
+        batched = (time.perf_counter() - started) / args.repeat
+        print(
+            f"{count:>9} rows: batched {batched * 1000:8.2f}ms"
+            f" | pairwise {pairwise_per_row * count * 1000:10.2f}ms (extrapolated)"
+        )
+
+
+if __name__ == "__main__":
+    main()
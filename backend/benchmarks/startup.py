@@ -0,0 +1,72 @@
+"""
+Worker startup cost: `import app.main` in a fresh interpreter, then the
+embedding model import, load, warm-up and first/second encode latency:
+
+    uv run python -m benchmarks.startup --runs 5
+
+Importing the app no longer loads the model; before, the import alone paid
+the model import + load seconds reported below.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from app.services.embedding import EmbeddingModel
+from app.utilities.config import CONFIG
+
+IMPORT_SCRIPT = (
+    "import sys, time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started, 'sentence_transformers' in sys.modules)"
+)
+
+
+def measure_import(runs: int) -> tuple[list[float], bool]:
+    seconds, loaded = [], False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split()
+        seconds.append(float(output[-2]))
+        loaded = loaded or output[-1] == "True"
+    return seconds, loaded
+
+
+def measure_encode(embedding_model: EmbeddingModel) -> float:
+    started = time.perf_counter()
+    embedding_model.encode(["a watercolor fox in the snow"])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--model", default=CONFIG.EMBEDDING.MODEL_NAME)
+    args = parser.parse_args()
+
+    seconds, loaded = measure_import(args.runs)
+    print(
+        f"import app.main: median {statistics.median(seconds):.2f}s "
+        f"over {args.runs} runs, model imported: {loaded}"
+    )
+
+    cold = EmbeddingModel(args.model)
+    cold.load()
+    first, second = measure_encode(cold), measure_encode(cold)
+    print(
+        f"model import {cold.timings['import_seconds']:.2f}s, "
+        f"load {cold.timings['load_seconds']:.2f}s"
+    )
+    print(
+        f"encode without warm-up: first {first * 1000:.1f}ms, "
+        f"second {second * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares the prompt image similarity lookup against the previous linear scan.
+
+    uv run python -m benchmarks.vector_index --rows 1000000
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+DIMENSION = 384
+THRESHOLD = 0.8
+
+
+def linear_scan(query: str, embeddings: list[str]) -> int:
+    # Previous implementation: parse every stored embedding per request
+    vec_a = np.array(eval(query))  # pylint: disable=eval-used
+    for i, embedding in enumerate(embeddings):
+        vec_b = np.array(eval(embedding))  # pylint: disable=eval-used
+        similarity = np.dot(vec_a, vec_b) / (
+            np.linalg.norm(vec_a) * np.linalg.norm(vec_b)
+        )
+        if similarity >= THRESHOLD:
+            return i
+    return -1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--linear-sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((args.rows, DIMENSION), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    # Queries are perturbed copies of stored vectors, so each has a true match
+    targets = rng.choice(args.rows, size=args.queries, replace=False)
+    queries = vectors[targets] + 0.02 * rng.standard_normal(
+        (args.queries, DIMENSION), dtype=np.float32
+    )
+
+    started = time.perf_counter()
+    index = VectorIndex(dimension=DIMENSION, nprobe=args.nprobe)
+    index.build(list(range(args.rows)), vectors)
+    print(f"build: {time.perf_counter() - started:.2f}s ({args.rows} rows)")
+
+    hits = 0
+    started = time.perf_counter()
+    for target, query in zip(targets, queries):
+        match = index.search(query, threshold=THRESHOLD)
+        hits += match is not None and match[0] == target
+    per_query = (time.perf_counter() - started) / args.queries
+    print(f"index: {per_query * 1000:.3f}ms/query, recall {hits / args.queries:.3f}")
+
+    # The linear scan is extrapolated from a sample, a full run takes hours
+    sample = [json.dumps(x.tolist()) for x in vectors[: args.linear_sample]]
+    started = time.perf_counter()
+    linear_scan(json.dumps(rng.standard_normal(DIMENSION).tolist()), sample)
+    per_row = (time.perf_counter() - started) / args.linear_sample
+    print(f"linear scan: {per_row * args.rows * 1000:.1f}ms/query (extrapolated)")
+
+
+if __name__ == "__main__":
+    main()
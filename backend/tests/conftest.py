@@ -0,0 +1,14 @@
+import os
+
+# Settings the app reads on import; no database is contacted until a query runs
+for name, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USERNAME": "test",
+    "DB_PASSWORD": "test",
+    "DB_DATABASE": "test",
+    "JWT_SECRET_KEY": "test",
+    "JWT_ALGORITHM": "HS256",
+    "LOG_ASYNC": "false",
+}.items():
+    os.environ.setdefault(name, value)
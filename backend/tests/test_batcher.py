@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utilities.batcher import MicroBatcher
+
+
+def test_concurrent_calls_share_a_batch():
+    batches = []
+
+    def process_batch(items: list) -> list:
+        batches.append(items)
+        return [x * 2 for x in items]
+
+    async def main():
+        batcher = MicroBatcher(process_batch, max_batch_size=8, max_wait=0.05)
+        results = await batcher.submit_many(list(range(10)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(main()) == [x * 2 for x in range(10)]
+    assert [len(x) for x in batches] == [8, 2]
+
+
+def test_failed_batch_fails_its_callers():
+    def process_batch(items: list) -> list:
+        raise ValueError("model unavailable")
+
+    async def main():
+        batcher = MicroBatcher(process_batch)
+        with pytest.raises(ValueError):
+            await batcher.submit(1)
+        await batcher.stop()
+
+    asyncio.run(main())
+
+
+def test_stop_fails_pending_calls():
+    def process_batch(items: list) -> list:
+        time.sleep(0.2)
+        return items
+
+    async def main():
+        batcher = MicroBatcher(process_batch, max_batch_size=2, max_wait=0)
+        calls = [asyncio.create_task(batcher.submit(x)) for x in range(5)]
+        # The first batch is being processed, the rest is still queued
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        assert all(isinstance(x, RuntimeError) for x in results)
+
+        # A restarted worker still serves new calls
+        assert await batcher.submit(7) == 7
+        await batcher.stop()
+
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
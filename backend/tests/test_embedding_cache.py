@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from app.services import embedding
+from app.utilities.embedding_cache import EmbeddingCache, SQLiteEmbeddingStore
+from app.utilities.text import fingerprint_prompt
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteEmbeddingStore(str(tmp_path / "embeddings.db"), namespace="test")
+    yield store
+    store.close()
+
+
+def test_store_reads_do_not_wait_on_writes(store):
+    store.set_many({"a": np.ones(4, dtype=np.float32)})
+
+    # Held by a commit in progress, reads use their own connection
+    found = {}
+    with store._lock:
+        reader = threading.Thread(target=lambda: found.update(store.get_many(["a"])))
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+
+    assert list(found) == ["a"]
+    assert found["a"].tolist() == [1, 1, 1, 1]
+
+
+def test_lookup_reads_store_off_the_event_loop(store, monkeypatch):
+    cache = EmbeddingCache(max_bytes=1 << 20, store=store)
+    cache.set_many({fingerprint_prompt("stored"): np.ones(4, dtype=np.float32)})
+    cache.clear()
+    cache.set_many({fingerprint_prompt("memory"): np.zeros(4, dtype=np.float32)})
+
+    blocking_calls = []
+
+    async def run_blocking(func, *args):
+        blocking_calls.append(args)
+        return func(*args)
+
+    monkeypatch.setattr(embedding, "embedding_cache", cache)
+    monkeypatch.setattr(embedding, "run_blocking", run_blocking)
+
+    embeddings, missing = asyncio.run(
+        embedding.lookup_embeddings_async(["memory", "stored", "new"])
+    )
+    assert missing == ["new"]
+    assert embeddings[2] is None
+    assert blocking_calls == [([fingerprint_prompt(x) for x in ["stored", "new"]],)]
+
+    # Promoted by the store hit, so memory alone answers next time
+    blocking_calls.clear()
+    embeddings, missing = asyncio.run(
+        embedding.lookup_embeddings_async(["memory", "stored"])
+    )
+    assert missing == []
+    assert blocking_calls == []
+    assert cache.stats()["store_hits"] == 1
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.utilities.executor import BoundedExecutor, ExecutorSaturated
+
+
+def test_cancelled_callers_keep_their_slot_until_done():
+    release = threading.Event()
+
+    async def main():
+        executor = BoundedExecutor(max_workers=1, max_queue=1, name="test")
+        calls = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        # Disconnected clients, the running call keeps its thread busy
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        assert executor.pending == 1
+        with pytest.raises(ExecutorSaturated):
+            await asyncio.gather(*[executor.run(release.wait) for _ in range(2)])
+
+        release.set()
+        while executor.pending:
+            await asyncio.sleep(0.01)
+        return executor.stats()
+
+    stats = asyncio.run(asyncio.wait_for(main(), timeout=5))
+    assert stats["pending"] == 0
+    assert stats["rejected"] == 1
+
+
+def test_failures_are_not_counted_as_completed():
+    def fail():
+        raise ValueError("bad hash")
+
+    async def main():
+        executor = BoundedExecutor(max_workers=1, max_queue=1, name="test")
+        assert await executor.run(sum, [1, 2]) == 3
+        with pytest.raises(ValueError):
+            await executor.run(fail)
+        return executor.stats()
+
+    stats = asyncio.run(main())
+    assert (stats["completed"], stats["failed"]) == (1, 1)
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.utilities.http_client import HTTPClientManager
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok"
+
+
+class StubServer:
+    """Keep-alive HTTP/1.1 server counting the TCP connections it accepts."""
+
+    def __init__(self):
+        self.connections = 0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                # Yield, so concurrent requests overlap on the pool
+                await asyncio.sleep(0.001)
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/image"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def send_requests(requests: int, **options) -> int:
+    server = StubServer()
+    url = await server.start()
+    manager = HTTPClientManager()
+    manager.register("stub", **options)
+    await manager.start()
+    try:
+        responses = await asyncio.gather(
+            *[manager.request("stub", "GET", url) for _ in range(requests)]
+        )
+    finally:
+        await manager.stop()
+        await server.stop()
+    assert [x.status_code for x in responses] == [200] * requests
+    return server.connections
+
+
+def test_sequential_requests_reuse_one_connection():
+    async def main():
+        server = StubServer()
+        url = await server.start()
+        manager = HTTPClientManager()
+        manager.register("stub")
+        for _ in range(50):
+            response = await manager.request("stub", "GET", url)
+            assert response.status_code == 200
+        await manager.stop()
+        await server.stop()
+        return server.connections
+
+    assert asyncio.run(main()) == 1
+
+
+@pytest.mark.parametrize(
+    "options, limit",
+    [
+        ({"max_concurrency_per_host": 5}, 5),
+        ({"max_concurrency_per_host": 0, "max_connections": 4}, 4),
+    ],
+)
+def test_concurrent_requests_stay_within_the_pool(options, limit):
+    connections = asyncio.run(send_requests(200, **options))
+    assert 1 <= connections <= limit
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.models.enums.job import JobStatus
+from app.utilities.contextvar import (
+    contextvar_correlation_id,
+    contextvar_session_user_id,
+)
+from app.utilities.cache import InMemoryRedis
+from app.utilities.job_queue import JobQueue, JobQueueFull
+from app.utilities.query_cache import RedisCacheBackend
+
+
+async def wait_finished(job_queue: JobQueue, *jobs):
+    for job in jobs:
+        while not job.is_finished:
+            assert await job_queue.wait(job, timeout=1)
+
+
+def test_jobs_run_in_the_submitting_context():
+    async def read_context():
+        await asyncio.sleep(0)
+        return contextvar_correlation_id.get(), contextvar_session_user_id.get()
+
+    async def submit_as(job_queue: JobQueue, correlation_id: str, user_id: int):
+        contextvar_correlation_id.set(correlation_id)
+        contextvar_session_user_id.set(user_id)
+        return await job_queue.submit(read_context, owner_id=user_id)
+
+    async def main():
+        job_queue = JobQueue(max_workers=1)
+        # The first submit starts the workers, later jobs must not inherit it
+        jobs = [
+            await asyncio.create_task(submit_as(job_queue, f"request-{i}", i))
+            for i in range(1, 4)
+        ]
+        await wait_finished(job_queue, *jobs)
+        await job_queue.stop()
+        return [x.result for x in jobs]
+
+    assert asyncio.run(main()) == [(f"request-{i}", i) for i in range(1, 4)]
+
+
+def test_queued_jobs_survive_a_restart():
+    async def main():
+        job_queue = JobQueue(max_workers=1)
+        started = asyncio.Event()
+
+        async def block():
+            started.set()
+            await asyncio.Event().wait()
+
+        async def succeed():
+            return "done"
+
+        running = await job_queue.submit(block)
+        queued = await job_queue.submit(succeed)
+        await started.wait()
+        await job_queue.stop()
+        assert running.status == JobStatus.FAILED
+        assert queued.status == JobStatus.QUEUED
+
+        later = await job_queue.submit(succeed)
+        await wait_finished(job_queue, queued, later)
+        await job_queue.stop()
+        return queued, later
+
+    queued, later = asyncio.run(main())
+    assert queued.result == later.result == "done"
+
+
+def test_full_queue_rejects():
+    async def main():
+        job_queue = JobQueue(max_workers=1, max_queue_size=1)
+
+        async def succeed():
+            return "done"
+
+        job = await job_queue.submit(succeed)
+        with pytest.raises(JobQueueFull):
+            await job_queue.submit(succeed)
+        await wait_finished(job_queue, job)
+        await job_queue.stop()
+        return job_queue.stats()
+
+    assert asyncio.run(main())["rejected"] == 1
+
+
+def test_jobs_are_readable_from_another_worker():
+    async def main():
+        # Two queues sharing a store stand in for two worker processes
+        store = RedisCacheBackend(InMemoryRedis(), prefix="jobs")
+        worker_a = JobQueue(max_workers=1, store=store, poll_interval=0.01)
+        worker_b = JobQueue(max_workers=1, store=store, poll_interval=0.01)
+        release = asyncio.Event()
+
+        async def succeed():
+            await release.wait()
+            return "done"
+
+        job = await worker_a.submit(succeed, owner_id=1)
+        polled = await worker_b.get(job.id)
+        assert polled is not job
+        assert polled.owner_id == 1
+        assert not await worker_b.wait(polled, timeout=0.05)
+
+        release.set()
+        while not polled.is_finished:
+            assert await worker_b.wait(polled, timeout=1)
+        assert await worker_b.get("missing") is None
+        await worker_a.stop()
+        return polled
+
+    polled = asyncio.run(main())
+    assert polled.status == JobStatus.SUCCEEDED
+    assert polled.result == "done"
@@ -0,0 +1,205 @@
+import asyncio
+
+import pytest
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    select,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models.databases.queries.base import PaginateModel, SortModel
+from app.models.exceptions import LogicException
+from app.queries.base import lazyload_data, lazyload_union_data
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+    Column("score", Integer),
+)
+
+# Repeated scores, so pages only line up if ties are broken on `id`
+ROWS = [{"id": i, "name": f"item {i}", "score": i * 7 % 4} for i in range(1, 12)]
+
+
+@pytest.fixture
+def async_engine(tmp_path):
+    path = tmp_path / "items.db"
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(items.insert(), ROWS)
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    yield async_engine
+    asyncio.run(async_engine.dispose())
+
+
+async def lazyload_pages(async_engine, sort: SortModel, **kwargs) -> list:
+    pages, cursor = [], None
+    async with AsyncSession(async_engine) as async_db:
+        # Bounded, so a cursor that never advances fails instead of hanging
+        while len(pages) <= len(ROWS):
+            result = await lazyload_data(
+                async_db=async_db,
+                select_query=select(items).select_from(items),
+                pagination=PaginateModel(
+                    limit=3, mode="keyset", cursor=cursor, **kwargs
+                ),
+                sort=sort,
+            )
+            pages.append(result)
+            cursor = result.next_cursor
+            if cursor is None:
+                break
+    return pages
+
+
+@pytest.mark.parametrize(
+    "order_by, sort_order",
+    [("id", "asc"), ("id", "desc"), ("score", "asc"), ("score", "desc")],
+)
+@pytest.mark.parametrize("count_strategy", ["exact", "has_more"])
+def test_keyset_pages_cover_every_row_once(
+    async_engine, order_by, sort_order, count_strategy
+):
+    pages = asyncio.run(
+        lazyload_pages(
+            async_engine,
+            SortModel(order_by=order_by, sort_order=sort_order),
+            count_strategy=count_strategy,
+        )
+    )
+
+    expected = sorted(
+        ROWS,
+        key=lambda x: (x[order_by], x["id"]),
+        reverse=sort_order == "desc",
+    )
+    assert [x.id for page in pages for x in page.data] == [x["id"] for x in expected]
+    assert len(pages) == 4
+    if count_strategy == "exact":
+        # The seek predicate is not applied to the COUNT statement
+        assert {x.count for x in pages} == {len(ROWS)}
+    else:
+        assert [x.has_more for x in pages] == [True, True, True, False]
+
+
+def test_keyset_cursor_of_another_sort_is_rejected(async_engine):
+    pages = asyncio.run(
+        lazyload_pages(async_engine, SortModel(order_by="id", sort_order="asc"))
+    )
+
+    async def lazyload_with_cursor():
+        async with AsyncSession(async_engine) as async_db:
+            return await lazyload_data(
+                async_db=async_db,
+                select_query=select(items).select_from(items),
+                pagination=PaginateModel(
+                    limit=3, mode="keyset", cursor=pages[0].next_cursor
+                ),
+                sort=SortModel(order_by="score", sort_order="asc"),
+            )
+
+    with pytest.raises(LogicException, match="INVALID_PAGINATION_CURSOR"):
+        asyncio.run(lazyload_with_cursor())
+
+
+def test_keyset_requires_sort_column_to_be_selected(async_engine):
+    async def lazyload_without_score():
+        async with AsyncSession(async_engine) as async_db:
+            return await lazyload_data(
+                async_db=async_db,
+                select_query=select(items.c.id, items.c.name).select_from(items),
+                pagination=PaginateModel(limit=3, mode="keyset"),
+                sort=SortModel(order_by="score", sort_order="asc"),
+            )
+
+    with pytest.raises(LogicException):
+        asyncio.run(lazyload_without_score())
+
+
+def test_keyset_estimate_ignores_the_cursor(async_engine, monkeypatch):
+    estimated = []
+
+    async def estimate_count(async_db, select_query):
+        estimated.append(select_query.whereclause)
+        return len(ROWS)
+
+    monkeypatch.setattr("app.queries.base.estimate_count", estimate_count)
+    pages = asyncio.run(
+        lazyload_pages(
+            async_engine,
+            SortModel(order_by="score", sort_order="asc"),
+            count_strategy="estimate",
+        )
+    )
+
+    assert len(pages) == 4
+    assert estimated == [None] * 4
+    assert {x.count for x in pages} == {len(ROWS)}
+
+
+def select_union_branches() -> list:
+    # Split on parity, so ids are unique across the branches
+    return [
+        select(items).select_from(items).filter(items.c.id % 2 == 0),
+        select(items).select_from(items).filter(items.c.id % 2 == 1),
+    ]
+
+
+# Offset paging has no tie-break, so only distinct sort keys give it one order
+@pytest.mark.parametrize(
+    "order_by, sort_order",
+    [("id", "asc"), ("id", "desc"), ("name", "asc"), ("name", "desc")],
+)
+def test_keyset_union_pages_match_offset_pages(
+    async_engine, monkeypatch, order_by, sort_order
+):
+    # SQLite rejects parenthesized branches with their own ORDER BY/LIMIT, so
+    # each branch is wrapped in a subquery that keeps its seek, order and limit
+    monkeypatch.setattr(
+        "app.queries.base.union_all",
+        lambda *branches: union_all(*[select(x.subquery()) for x in branches]),
+    )
+    sort = SortModel(order_by=order_by, sort_order=sort_order)
+
+    async def lazyload_union_pages(mode: str) -> list:
+        pages, page, cursor = [], 1, None
+        async with AsyncSession(async_engine) as async_db:
+            while len(pages) <= len(ROWS):
+                result = await lazyload_union_data(
+                    async_db=async_db,
+                    select_queries=select_union_branches(),
+                    pagination=(
+                        PaginateModel(limit=3, mode=mode, cursor=cursor)
+                        if mode == "keyset"
+                        else PaginateModel(limit=3, page=page)
+                    ),
+                    sort=sort,
+                )
+                pages.append(result)
+                page, cursor = page + 1, result.next_cursor
+                if (mode == "keyset" and cursor is None) or len(result.data) < 3:
+                    break
+        return pages
+
+    keyset_pages = asyncio.run(lazyload_union_pages("keyset"))
+    offset_pages = asyncio.run(lazyload_union_pages("offset"))
+
+    assert [[x.id for x in page.data] for page in keyset_pages] == [
+        [x.id for x in page.data] for page in offset_pages
+    ]
+    assert sorted(x.id for page in keyset_pages for x in page.data) == [
+        x["id"] for x in ROWS
+    ]
+    assert {x.count for x in keyset_pages} == {len(ROWS)}
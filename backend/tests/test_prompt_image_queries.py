@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.databases.orm.prompt_image import PromptImage
+from app.models.databases.orm.user import User
+from app.queries.prompt_image import exact_prompt_cache, save_prompt_image
+from app.utilities.text import fingerprint_prompt
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    PromptImage.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    exact_prompt_cache.clear()
+
+
+def create_prompt_image(prompt_text: str, is_public: bool = True) -> PromptImage:
+    return PromptImage(
+        user_id=1,
+        prompt_text=prompt_text,
+        prompt_hash=fingerprint_prompt(prompt_text),
+        embedding=b"\x00" * 4,
+        is_public=is_public,
+    )
+
+
+def test_saving_a_new_row_drops_its_cached_prompt(db):
+    prompt_image = create_prompt_image("A Cat")
+    exact_prompt_cache.set(prompt_image.prompt_hash, "stale")
+    save_prompt_image(db, prompt_image)
+    assert exact_prompt_cache.get(prompt_image.prompt_hash) is None
+
+
+def test_updates_drop_the_previous_and_current_prompt(db):
+    prompt_image = save_prompt_image(db, create_prompt_image("a cat"))
+    old_hash = prompt_image.prompt_hash
+    exact_prompt_cache.set(old_hash, "cached")
+
+    prompt_image.prompt_text = "a dog"
+    prompt_image.prompt_hash = fingerprint_prompt("a dog")
+    exact_prompt_cache.set(prompt_image.prompt_hash, "cached")
+    save_prompt_image(db, prompt_image)
+    assert exact_prompt_cache.get(old_hash) is None
+    assert exact_prompt_cache.get(prompt_image.prompt_hash) is None
+
+
+def test_visibility_change_drops_the_cached_prompt(db):
+    prompt_image = create_prompt_image("a cat")
+    db.add(prompt_image)
+    db.commit()
+    exact_prompt_cache.set(prompt_image.prompt_hash, "cached")
+
+    prompt_image.is_public = False
+    save_prompt_image(db, prompt_image)
+    assert exact_prompt_cache.get(prompt_image.prompt_hash) is None
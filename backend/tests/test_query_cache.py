@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+from sqlalchemy.dialects import sqlite
+
+from app.utilities.cache import InMemoryRedis
+from app.utilities.query_cache import MemoryCacheBackend, QueryCache, RedisCacheBackend
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+)
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+DIALECT = sqlite.dialect()
+
+
+@pytest.fixture(
+    params=[
+        MemoryCacheBackend,
+        lambda: RedisCacheBackend(InMemoryRedis()),
+    ],
+    ids=["memory", "redis"],
+)
+def query_cache(request):
+    return QueryCache(backend=request.param())
+
+
+def get_key(query_cache: QueryCache, statement, extra=()):
+    return asyncio.run(query_cache.get_key(DIALECT, [statement], extra))
+
+
+def test_key_depends_on_statement_values(query_cache):
+    first = get_key(query_cache, select(items).where(items.c.id == 1))
+    assert first == get_key(query_cache, select(items).where(items.c.id == 1))
+    assert first != get_key(query_cache, select(items).where(items.c.id == 2))
+    assert first != get_key(query_cache, select(items).where(items.c.id == 1), [5])
+
+
+def test_invalidation_changes_keys_of_the_table(query_cache):
+    statement = select(items).where(items.c.name == "cat")
+    other = select(users)
+    key, other_key = get_key(query_cache, statement), get_key(query_cache, other)
+    asyncio.run(query_cache.set(key, ["cached"]))
+    assert asyncio.run(query_cache.get(key)) == ["cached"]
+
+    query_cache.invalidate_sync("items")
+    new_key = get_key(query_cache, statement)
+    assert new_key != key
+    assert asyncio.run(query_cache.get(new_key)) is None
+    # Statements over other tables keep their entries
+    assert get_key(query_cache, other) == other_key
+
+
+def test_shared_backend_invalidates_every_worker():
+    client = InMemoryRedis()
+    workers = [QueryCache(backend=RedisCacheBackend(client)) for _ in range(2)]
+    statement = select(items)
+    key = get_key(workers[0], statement)
+    asyncio.run(workers[0].set(key, ["cached"]))
+    assert asyncio.run(workers[1].get(get_key(workers[1], statement))) == ["cached"]
+
+    asyncio.run(workers[1].invalidate("items"))
+    assert get_key(workers[0], statement) != key
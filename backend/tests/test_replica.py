@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.databases.queries.base import PaginateModel, SortModel
+from app.queries.base import lazyload_data
+from app.utilities.contextvar import contextvar_session_user_id
+from app.utilities.query_cache import MemoryCacheBackend, query_cache
+from app.utilities.replica import AsyncReplicaSession, Replica, ReplicaRouter
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+)
+
+
+def create_database(path, rows: int) -> Replica:
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            items.insert(),
+            [{"id": i, "name": f"item {i}"} for i in range(1, rows + 1)],
+        )
+    return Replica(
+        engine=engine,
+        async_engine=create_async_engine(f"sqlite+aiosqlite:///{path}"),
+    )
+
+
+@pytest.fixture
+def router(tmp_path):
+    # Row counts differ per database, so a result shows where it was read
+    primary = create_database(tmp_path / "primary.db", 2)
+    router = ReplicaRouter(
+        primary=primary.engine,
+        async_primary=primary.async_engine,
+        replicas=[
+            create_database(tmp_path / "replica_0.db", 3),
+            create_database(tmp_path / "replica_1.db", 5),
+        ],
+    )
+    yield router
+    for x in [primary, *router.replicas]:
+        asyncio.run(x.async_engine.dispose())
+        x.engine.dispose()
+
+
+def create_session_factory(router: ReplicaRouter) -> sessionmaker:
+    return sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=AsyncReplicaSession,
+        router=router,
+    )
+
+
+async def lazyload_items(
+    session_factory: sessionmaker,
+    cache: bool = False,
+    **kwargs,
+):
+    async with session_factory() as async_db:
+        return await lazyload_data(
+            async_db=async_db,
+            select_query=select(items).select_from(items),
+            pagination=PaginateModel(limit=10, **kwargs),
+            sort=SortModel(order_by="id", sort_order="asc"),
+            cache=cache,
+        )
+
+
+@pytest.mark.parametrize("count_strategy", ["exact", "estimate", "has_more"])
+def test_lazyload_on_replica_session(router, count_strategy):
+    session_factory = create_session_factory(router)
+    for _ in range(4):
+        result = asyncio.run(
+            lazyload_items(session_factory, count_strategy=count_strategy)
+        )
+        assert len(result.data) in (3, 5)
+        if count_strategy != "has_more":
+            # The count session reads the replica the page was read from
+            assert result.count == len(result.data)
+    assert [x.selected for x in router.replicas] == [2, 2]
+
+
+def test_cached_lazyload_on_replica_session(router, monkeypatch):
+    monkeypatch.setattr(query_cache, "backend", MemoryCacheBackend())
+    session_factory = create_session_factory(router)
+    first = asyncio.run(lazyload_items(session_factory, cache=True))
+    second = asyncio.run(lazyload_items(session_factory, cache=True))
+    assert second is first
+    assert [x.selected for x in router.replicas] == [1, 1]
+
+
+def test_lazyload_falls_back_to_primary(router):
+    for replica in router.replicas:
+        replica.healthy = False
+    result = asyncio.run(lazyload_items(create_session_factory(router)))
+    assert len(result.data) == result.count == 2
+    assert router.fallbacks == 1
+
+
+def test_lazyload_reads_own_writes_from_primary(router):
+    router.record_write(7)
+
+    async def lazyload_as_user():
+        contextvar_session_user_id.set(7)
+        return await lazyload_items(create_session_factory(router))
+
+    result = asyncio.run(lazyload_as_user())
+    assert len(result.data) == result.count == 2
+    assert router.sticky_reads == 1
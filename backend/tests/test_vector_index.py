@@ -0,0 +1,63 @@
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+DIMENSION = 16
+
+
+def random_vectors(count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, DIMENSION), dtype=np.float32)
+
+
+def test_flat_search_returns_best_match():
+    vectors = random_vectors(50)
+    index = VectorIndex(dimension=DIMENSION, train_threshold=1000)
+    index.build(list(range(1, 51)), vectors)
+    assert not index.is_trained
+
+    match = index.search(vectors[9] * 3)
+    assert match[0] == 10
+    assert np.isclose(match[1], 1.0)
+    assert index.search(-vectors[9], threshold=0.9) is None
+
+
+def test_trained_search_probes_buckets():
+    vectors = random_vectors(400)
+    index = VectorIndex(dimension=DIMENSION, nprobe=20, train_threshold=100)
+    index.build(list(range(400)), vectors)
+    assert index.is_trained
+
+    hits = sum(index.search(vectors[i])[0] == i for i in range(0, 400, 10))
+    assert hits == 40
+
+
+def test_sync_rescans_without_duplicates():
+    vectors = random_vectors(30)
+    index = VectorIndex(dimension=DIMENSION)
+    index.build([1, 2, 3, 5], vectors[[1, 2, 3, 5]])
+    index.add([6], vectors[[6]])
+
+    # Row 4 committed after row 5 was synced, the overlapping re-scan finds it
+    index.sync([3, 4, 5, 6, 7], vectors[[3, 4, 5, 6, 7]])
+    assert len(index) == 7
+    assert index.synced_id == 7
+    assert index.search(vectors[4])[0] == 4
+
+
+def test_add_defers_training_to_refresh():
+    vectors = random_vectors(400)
+    index = VectorIndex(dimension=DIMENSION, train_threshold=100, retrain_factor=2)
+    index.add(list(range(150)), vectors[:150])
+    assert not index.is_trained
+    assert index.needs_training
+
+    index.train()
+    nlist = len(index._centroids)  # pylint: disable=protected-access
+    assert not index.needs_training
+
+    index.add(list(range(150, 300)), vectors[150:300])
+    assert index.needs_training
+    index.train()
+    assert len(index._centroids) > nlist  # pylint: disable=protected-access
+    assert index.search(vectors[299])[0] == 299